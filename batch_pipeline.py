@@ -0,0 +1,463 @@
+"""
+Bounded-memory batch pipeline.
+
+The column pipeline (transformation2.run_job) reads every mapped field of
+every input file into a column and each transformation allocates another
+full column. Here every field written to a dynamic range is a generator
+instead: its source rows are read, defaulted, validated and transformed
+batch_rows at a time, and the output sheet writer consumes the values as they
+are produced. Peak memory depends on the batch size, not on the roster size
+(with a streaming reader backend; the openpyxl backend loads whole workbooks).
+
+    - Fields read from the same sheet share one walk of it, and input files
+      are opened one after another as the fields reach them.
+    - Transformations that need the whole column (generate_data_based_on) run
+      as stateful operators from transformation2.streaming_transformations,
+      whose state carries over between batches and input files.
+    - Single cells and fixed ranges are small; they are read first, through
+      the column pipeline, and rendered into the template.
+    - Every output sheet with dynamic ranges reads the inputs again, so no
+      sheet has to keep the values of another.
+    - Violations of the streamed fields are collected while they are read
+      and raised as one ValidationError after the whole pass (those of the
+      other fields are raised before any row is streamed).
+
+Streamed fields can only be written to dynamic ranges, without merges.
+Conditional formats are evaluated per row (never compiled to native rules),
+and the data store cache and parallel workers are not used.
+"""
+from functools import partial
+from itertools import islice, repeat, tee
+
+from instrumentation import measure
+from mapping_plan import is_dynamic, is_single_cell
+from tabular_sources import TABULAR_TYPES, open_tabular
+from transformation2 import (
+    STREAM_END,
+    apply_transformation,
+    apply_transformations_to_data_store,
+    collect_data_stores,
+    get_mapping_plan,
+    header_column,
+    merge_data_stores,
+    open_template,
+    read_and_validate_data,
+    reader_backend,
+    resolve_column,
+    stream_sheet,
+    streaming_transformations,
+    validation_failures,
+    write_mapped_data,
+)
+from validation_report import ValidationReport
+from workbook_readers import open_values_workbook
+
+# Rows per batch when the job doesn't set it
+DEFAULT_BATCH_ROWS = 10000
+
+
+class CurrentRow:
+    """
+    The value of a condition field at the row being written, as the column
+    apply_conditional_format looks it up in the data store
+    """
+
+    def __init__(self):
+        self.index = -1
+        self.value = None
+
+    def __len__(self):
+        return self.index + 1
+
+    def __getitem__(self, index):
+        if index != self.index:
+            raise IndexError("only the current row of a streamed field is known")
+        return self.value
+
+
+def streamed_fields(plan):
+    """
+    Fields that are columns of rows: dynamic sources, defaults written to
+    ranges and references to them. Returns {field name: FieldPlan}.
+    """
+    streamed = {}
+    for field in plan.fields:
+        if field.reference_field is not None:
+            is_streamed = field.reference_field in streamed
+        elif field.source_range is not None:
+            is_streamed = is_dynamic(field.source_range)
+        else:
+            # Like read_and_validate_data: a default is a column when it is written to ranges
+            is_streamed = (
+                field.default is not None
+                and bool(field.destinations)
+                and any(not is_single_cell(cell_range) for cell_range in field.destinations[0].ranges)
+            )
+        if not is_streamed:
+            continue
+        for destination in field.destinations:
+            if destination.merge is not None or not all(
+                is_dynamic(cell_range) for cell_range in destination.ranges
+            ):
+                raise ValueError(
+                    f"{field.field_name} is a column of rows; the batch pipeline can only write it to dynamic ranges without merges"
+                )
+        streamed[field.field_name] = field
+    return streamed
+
+
+def source_field(field, streamed):
+    """The field whose source a streamed field reads (itself, or the field it references)"""
+    while field.reference_field is not None:
+        field = streamed[field.reference_field]
+    return field
+
+
+def leading_field(plan):
+    """
+    The dynamic source field with the first start row. Defaults get one value
+    per row of it, the longest dynamic range when the ranges share a sheet.
+    """
+    dynamic = [
+        field
+        for field in plan.fields
+        if field.reference_field is None
+        and field.source_range is not None
+        and is_dynamic(field.source_range)
+    ]
+    return min(dynamic, key=lambda field: field.source_range.min_row, default=None)
+
+
+def read_static_data(input_files, mapping_schema, streamed, reader):
+    """
+    Read, merge and transform the fields that aren't streamed with the column
+    pipeline. Returns their data store.
+    """
+    schema = dict(
+        mapping_schema,
+        mappings=[
+            mapping for mapping in mapping_schema["mappings"] if mapping["field_name"] not in streamed
+        ],
+    )
+    if not schema["mappings"]:
+        return {}
+    data_stores = collect_data_stores(
+        partial(
+            read_and_validate_data,
+            input_file["path"],
+            schema,
+            input_type=input_file.get("type", "excel"),
+            reader=input_file.get("reader") or reader,
+            encoding=input_file.get("encoding"),
+        )
+        for input_file in input_files
+    )
+    return apply_transformations_to_data_store(merge_data_stores(data_stores), schema)
+
+
+class InputRows:
+    """
+    Opens the input files as the streamed fields reach them and gives every
+    field its own iterator over the rows of its source sheet. Fields reading
+    the same sheet share one walk of it; a file is closed once all its
+    iterators are exhausted.
+    """
+
+    def __init__(self, input_files, reader, readers_by_sheet):
+        self.input_files = input_files
+        self.reader = reader
+        # Number of fields reading each sheet
+        self.readers_by_sheet = readers_by_sheet
+        # file index -> [workbook, {sheet name: [row iterators]}, open iterators]
+        self.open_files = {}
+
+    def open(self, file_idx):
+        input_file = self.input_files[file_idx]
+        input_type = input_file.get("type", "excel")
+        if input_type in TABULAR_TYPES:
+            workbook = open_tabular(input_file["path"], input_type, input_file.get("encoding"))
+        else:
+            workbook = open_values_workbook(input_file["path"], input_file.get("reader") or self.reader)
+        iterators = {}
+        for sheet_name, count in self.readers_by_sheet.items():
+            sheet = workbook[sheet_name]
+            if getattr(workbook, "read_only", False):
+                # Read every row present in the file, not the declared dimensions
+                sheet.reset_dimensions()
+            iterators[sheet_name] = list(tee(sheet.iter_rows(values_only=True), count))
+        self.open_files[file_idx] = [workbook, iterators, sum(self.readers_by_sheet.values())]
+
+    def rows(self, file_idx, sheet_name):
+        """The rows of a sheet of an input file, for one field"""
+        if file_idx not in self.open_files:
+            self.open(file_idx)
+        open_file = self.open_files[file_idx]
+        try:
+            yield from open_file[1][sheet_name].pop()
+        finally:
+            open_file[2] -= 1
+            if not open_file[2]:
+                open_file[0].close()
+                del self.open_files[file_idx]
+
+
+def skip_rows(rows, count):
+    """Consume up to count rows of an iterator (none when count <= 0)"""
+    for _ in islice(rows, max(count, 0)):
+        pass
+
+
+def source_rows(rows, field):
+    """
+    Skip the rows of a sheet above a field's dynamic source range. Returns the
+    range (with its header column resolved) and the rows from its first row on.
+    """
+    cell_range = field.source_range
+    rows = iter(rows)
+    if field.source_column is None:
+        skip_rows(rows, cell_range.min_row - 1)
+        return cell_range, rows
+    header_row = cell_range.min_row - 1
+    skip_rows(rows, header_row - 1)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError(
+            f"Column '{field.source_column}' of {field.field_name} not found: {field.source_sheet} has no row {header_row}"
+        )
+    return header_column(header, field), rows
+
+
+def source_values(rows, col_idx, constant=STREAM_END):
+    """
+    The values of column col_idx (or constant) for each of the rows. Trailing
+    rows without cells are dropped, like stream_sources does.
+    """
+    # Rows without cells are only written once a row with cells follows them
+    pending = 0
+    for row in rows:
+        if not row:
+            pending += 1
+            continue
+        if pending:
+            yield from repeat(None if constant is STREAM_END else constant, pending)
+            pending = 0
+        if constant is not STREAM_END:
+            yield constant
+        else:
+            yield row[col_idx - 1] if col_idx <= len(row) else None
+
+
+def batches(values, batch_rows):
+    """Lists of up to batch_rows consecutive values"""
+    while True:
+        batch = list(islice(values, batch_rows))
+        if not batch:
+            return
+        yield batch
+
+
+class RowStreams:
+    """
+    The transformed values of the streamed fields, read from the inputs in
+    batches. The violations of the fields are added to report the first time
+    each field is read.
+    """
+
+    def __init__(self, plan, streamed, input_files, reader, batch_rows, schema):
+        self.plan = plan
+        self.streamed = streamed
+        self.input_files = input_files
+        self.reader = reader
+        self.batch_rows = batch_rows
+        self.schema = schema
+        self.leader = leading_field(plan)
+        self.report = ValidationReport()
+        # Fields whose values have been validated, in an earlier output sheet
+        self.validated = set()
+        # Set at the first violation. The output is discarded then, so the
+        # values are only read on for the report, without transforming them.
+        self.invalid = False
+
+    def read_field(self, field):
+        """Where a field's rows come from: (field with the source range, constant or STREAM_END)"""
+        source = source_field(field, self.streamed)
+        if source.source_range is None:
+            return self.leader, source.default
+        return source, STREAM_END
+
+    def field_batches(self, field, inputs):
+        """Validated batches of a field's values, file after file"""
+        source, constant = self.read_field(field)
+        if source is None:
+            # No dynamic range to take the number of rows from
+            return
+        origin = source_field(field, self.streamed)
+        resolve = origin.source_range is not None
+        # Defaults aren't validated, like read_and_validate_data
+        validations = field.validations if (field.reference_field is not None or resolve) else None
+        # Violations are reported the first time a field is read. A reference
+        # gets the resolved values of its origin, whose violations the origin reports.
+        report = self.report if field.field_name not in self.validated else ValidationReport()
+        for file_idx, input_file in enumerate(self.input_files):
+            cell_range, rows = source_rows(inputs.rows(file_idx, source.source_sheet), source)
+            values = source_values(rows, cell_range.min_col, constant)
+            # Constants have no cells
+            sheet, column = (source.source_sheet, cell_range.min_col) if resolve else (None, None)
+            first_row = cell_range.min_row
+            # The fields read the files in step, not in turn, so each keeps its own report per file
+            file_report = ValidationReport(input_file["path"])
+            file_resolve_report = file_report if field is origin else ValidationReport()
+            for batch in batches(values, self.batch_rows):
+                if resolve:
+                    # Resolved and validated in one pass
+                    batch = resolve_column(batch, origin, file_resolve_report, sheet, first_row, column)
+                if validations is not None and field is not origin:
+                    for offset, message in validation_failures(batch, validations):
+                        file_report.add(field.field_name, message, sheet, column, first_row + (offset or 0))
+                first_row += len(batch)
+                if file_report.groups or file_resolve_report.groups:
+                    self.invalid = True
+                yield batch
+            if first_row == cell_range.min_row and validations is not None:
+                # An empty column fails the required validations
+                for offset, message in validation_failures([], validations):
+                    file_report.add(field.field_name, message, sheet, column, first_row)
+            report.extend(file_report.violations)
+
+    def operators(self, field):
+        """One function per transformation of a field, called on every batch"""
+        operators = []
+        for transformation in field.transformations:
+            streaming = streaming_transformations.get(transformation.name)
+            if streaming is not None:
+                operators.append(streaming(*transformation.params, schema=self.schema))
+            else:
+                operators.append(
+                    partial(apply_transformation, transformation=transformation, schema=self.schema)
+                )
+        return operators
+
+    def field_values(self, field, inputs):
+        operators = self.operators(field)
+        for batch in self.field_batches(field, inputs):
+            if not self.invalid:
+                for operator in operators:
+                    batch = operator(batch)
+            yield from batch
+
+    def open(self, consumers):
+        """
+        One iterator per consumer of every streamed field, reading the inputs
+        once. consumers is {field name: number of iterators}.
+        """
+        readers_by_sheet = {}
+        for field_name in consumers:
+            source, constant = self.read_field(self.streamed[field_name])
+            if source is not None:
+                readers_by_sheet[source.source_sheet] = readers_by_sheet.get(source.source_sheet, 0) + 1
+        inputs = InputRows(self.input_files, self.reader, readers_by_sheet)
+        return {
+            field_name: list(tee(self.field_values(self.streamed[field_name], inputs), count))
+            for field_name, count in consumers.items()
+        }
+
+
+def with_condition(values, condition_values, current_row):
+    """Values of a writer, moving current_row to the condition field's value of every row"""
+    for row_offset, value in enumerate(values):
+        condition_value = next(condition_values, STREAM_END)
+        if condition_value is not STREAM_END:
+            current_row.index = row_offset
+            current_row.value = condition_value
+        yield value
+    # Drain the rest, so the shared walk of the inputs isn't held back
+    for _ in condition_values:
+        pass
+
+
+def sheet_writers(plan, streamed, sheet_name):
+    """
+    The dynamic ranges of a sheet, in mapping order, as (field, destination,
+    range index, range, streamed condition field or None). Also returns the
+    number of iterators they need of every streamed field.
+    """
+    specs = []
+    consumers = {}
+    for field in plan.fields:
+        for destination in field.destinations:
+            if destination.sheet != sheet_name:
+                continue
+            condition = destination.conditional_format
+            condition_field = None
+            if condition and "when" in condition and condition["when"]["field"] in streamed:
+                condition_field = condition["when"]["field"]
+            for idx, cell_range in enumerate(destination.ranges):
+                if not is_dynamic(cell_range):
+                    continue
+                if field.field_name in streamed:
+                    consumers[field.field_name] = consumers.get(field.field_name, 0) + 1
+                if condition_field is not None:
+                    consumers[condition_field] = consumers.get(condition_field, 0) + 1
+                specs.append((field, destination, idx, cell_range, condition_field))
+    return specs, consumers
+
+
+def stream_batched_sheet(output_workbook, template_sheet, plan, streamed, row_streams, static_data):
+    """Write one sheet of the output, with its dynamic ranges fed from fresh streams of the inputs"""
+    specs, consumers = sheet_writers(plan, streamed, template_sheet.title)
+    streams = row_streams.open(consumers)
+    writers = []
+    for field, destination, idx, cell_range, condition_field in specs:
+        if field.field_name in streamed:
+            values = streams[field.field_name].pop()
+        else:
+            values = iter(static_data.get(field.field_name, []))
+        data_store = static_data
+        if condition_field is not None:
+            current_row = CurrentRow()
+            data_store = {condition_field: current_row}
+            values = with_condition(values, streams[condition_field].pop(), current_row)
+        writers.append(
+            (cell_range.min_col, cell_range.min_row, values, idx, destination, True, data_store)
+        )
+    rows = stream_sheet(output_workbook, template_sheet, writers, plan.default_formats)
+    row_streams.validated.update(consumers)
+    return rows
+
+
+def run_batched_job(
+    input_files, mapping_schema, template_path, output_file_path, batch_rows=DEFAULT_BATCH_ROWS, reader=None
+):
+    """Read, transform and write the input files in batches of batch_rows rows"""
+    from workbook_stream import close_streamed_sheets, stream_workbook
+
+    reader = reader_backend(reader)
+    plan = get_mapping_plan(mapping_schema)
+    streamed = streamed_fields(plan)
+
+    with measure("stage", "read"):
+        static_data = read_static_data(input_files, mapping_schema, streamed, reader)
+
+    with measure("template", "render"):
+        template = open_template(template_path)
+        write_mapped_data(template, plan, static_data, include_dynamic=False)
+    output_workbook = stream_workbook(template)
+
+    row_streams = RowStreams(plan, streamed, input_files, reader, batch_rows, mapping_schema)
+    with measure("stage", "write"):
+        try:
+            for template_sheet in template.worksheets:
+                with measure("sheet", template_sheet.title) as sheet_measurement:
+                    rows = stream_batched_sheet(
+                        output_workbook, template_sheet, plan, streamed, row_streams, static_data
+                    )
+                    if sheet_measurement is not None:
+                        sheet_measurement.rows = rows
+        except Exception:
+            close_streamed_sheets(output_workbook)
+            raise
+
+        with measure("save", "output"):
+            output_workbook.save(output_file_path)
+    # Raised after the save closes the write-only sheets; run_job removes the output
+    row_streams.report.raise_errors()
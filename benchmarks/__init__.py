@@ -0,0 +1 @@
+"""Benchmarks for the roster conversion and merge pipelines."""
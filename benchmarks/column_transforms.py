@@ -0,0 +1,68 @@
+"""
+Compare the column engine with the per-value transformations.
+
+Run from the repository root:
+    python -m benchmarks.column_transforms --rows 200000
+
+Each string transformation of transformation2 runs on a column of unique
+names and on a column that repeats a few names, once through the per-value
+function and once through column_transformations (best of --repeat runs).
+The column engine must not be slower on unique values, where factorizing
+can't save any calls.
+"""
+import argparse
+import random
+import string
+import time
+
+# Distinct names in the repeated column
+REPEATED_NAMES = 50
+
+
+def unique_names(rows, seed=0):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < rows:
+        first = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        last = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 11)))
+        names.add(f"{first} {last}")
+    return list(names)
+
+
+def repeated_names(rows, seed=0):
+    names = unique_names(REPEATED_NAMES, seed)
+    return [names[i % REPEATED_NAMES] for i in range(rows)]
+
+
+def best_time(func, data, repeat):
+    times = []
+    for _ in range(repeat):
+        values = list(data)
+        start = time.perf_counter()
+        func(values)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    import transformation2
+
+    columns = {"unique": unique_names(args.rows), "repeated": repeated_names(args.rows)}
+    print(f"{'transformation':16} {'column':10} {'per value':>10} {'engine':>10}")
+    for name in ("capitalize", "uppercase", "split_name", "title_case"):
+        per_value = getattr(transformation2, name)
+        engine = transformation2.column_transformations[name]
+        for label, data in columns.items():
+            print(
+                f"{name:16} {label:10} {best_time(per_value, data, args.repeat):9.3f}s"
+                f" {best_time(engine, data, args.repeat):9.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Check the import time of the pipeline modules against a budget.
+
+Run from the repository root:
+    python -m benchmarks.import_time
+
+Workers and scripts import these modules far more often than they run a
+job, so importing them must not load the mapping files or the heavy
+libraries. Every module is imported in a fresh interpreter with
+-X importtime (best of --repeat runs) and must stay under its budget and
+must not have imported any of DEFERRED_MODULES. Exits with status 1 if a
+module fails.
+"""
+import argparse
+import subprocess
+import sys
+
+# Cumulative import time budget per module, in milliseconds
+IMPORT_BUDGETS_MS = {
+    "cli": 50,
+    "transformation2": 100,
+    "merge_files": 50,
+    "roster_daemon": 100,
+}
+
+# Libraries that only the functions using them may import
+DEFERRED_MODULES = ("openpyxl", "pandas", "numpy", "pyarrow", "difflib")
+
+
+def measure_import(module):
+    """(cumulative import time in ms, deferred modules loaded) for one fresh import"""
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(name for name in {DEFERRED_MODULES!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time:  self [us] | cumulative | module"
+    cumulative = None
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+    return cumulative / 1000, result.stdout.split()
+
+
+def check_imports(budgets=IMPORT_BUDGETS_MS, repeat=5):
+    """Print the import time of every module and return the modules over budget"""
+    failed = []
+    for module, budget in budgets.items():
+        runs = [measure_import(module) for _ in range(repeat)]
+        milliseconds = min(ms for ms, loaded in runs)
+        loaded = sorted({name for ms, loaded in runs for name in loaded})
+        ok = milliseconds <= budget and not loaded
+        print(
+            f"{module:20} {milliseconds:8.1f} ms  (budget {budget} ms)"
+            + (f"  loads {', '.join(loaded)}" if loaded else "")
+            + ("" if ok else "  FAIL")
+        )
+        if not ok:
+            failed.append(module)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per module (best is kept)")
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        choices=list(IMPORT_BUDGETS_MS),
+        default=list(IMPORT_BUDGETS_MS),
+    )
+    args = parser.parse_args(argv)
+    budgets = {module: IMPORT_BUDGETS_MS[module] for module in args.modules}
+    return 1 if check_imports(budgets, args.repeat) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
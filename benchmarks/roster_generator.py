@@ -0,0 +1,116 @@
+"""
+Synthetic roster generator.
+
+Writes rosters with the same layout as the contractor inputs in
+roaster/input (and the source ranges in mappings/roaster-mapping.json):
+headers on row 1 of "Sheet1", one crew member per row from row 2.
+"""
+import os
+import random
+
+from openpyxl import Workbook
+
+HEADERS = [
+    "Team Leads Phone #",
+    "Full Name",
+    "First Name",
+    "Last Name",
+    "Classification",
+    "M/F",
+    "Equip Type",
+    "Equip #",
+    "Departing City and State",
+    "Departing Date and Time",
+    "Status",
+    "Sub?",
+    "Sub Info (If Applicable)",
+    "Send for Approval - Only check GF Box",
+    "No Rehire?",
+    "Approval",
+]
+
+FIRST_NAMES = [
+    "Daniel", "Issac", "Spencer", "James", "Ryan", "Brandon", "Koy", "Jeffery",
+    "Zachery", "Douglas", "Jeremy", "Michael", "Chris", "Tyler", "Austin", "Cody",
+]
+LAST_NAMES = [
+    "DeRuzzio", "Goins", "Ward", "Rankin", "Heath", "Payton", "Lindsey", "Mitchell",
+    "McCall", "Turner", "Smith", "Johnson", "Brown", "Davis", "Miller", "Wilson",
+]
+CREW_MEMBERS = [
+    "Journeyman Lineman",
+    "Journeyman Lineman",
+    "Equipment Operator",
+    "Groundman / Driver",
+    "Journeyman Linemen",  # misspelt on purpose, exercises fuzzy matching
+    "Mechanic",
+    "Safety",
+]
+EQUIPMENT = [
+    "Bucket Material Handler 51'-60'",
+    "Pickup",
+    "Digger Derrick",
+    "Backyard Machine",
+    "Pole Trailer",
+    "Mechanic Truck",
+    None,
+]
+CITIES = ["Knoxville, TN", "Albany, NY", "Monroe, CT", "Wilkes-Barre, PA"]
+
+
+def generate_rows(rows, seed=0):
+    """Yield roster rows, grouped into crews led by a (General) Foreman"""
+    rng = random.Random(seed)
+    generated = 0
+    while generated < rows:
+        crew_size = rng.randint(3, 8)
+        for position in range(min(crew_size, rows - generated)):
+            if position == 0:
+                classification = "General Foreman" if rng.random() < 0.15 else "Foreman"
+                phone = f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+            else:
+                classification = rng.choice(CREW_MEMBERS)
+                phone = None
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            equipment = rng.choice(EQUIPMENT)
+            yield [
+                phone,
+                f"{first_name} {last_name}",
+                first_name,
+                last_name,
+                classification,
+                rng.choice(["M", "F", None]),
+                equipment,
+                f"BT-{rng.randint(1000, 9999)}" if equipment else None,
+                rng.choice(CITIES),
+                None,
+                None,
+                None,
+                None,
+                classification == "General Foreman" or None,
+                None,
+                "Submitted" if position == 0 else None,
+            ]
+            generated += 1
+
+
+def generate_roster(output_path, rows, seed=0):
+    """Write a synthetic roster with the given number of data rows"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(HEADERS)
+    for row in generate_rows(rows, seed):
+        sheet.append(row)
+    workbook.save(output_path)
+    return output_path
+
+
+def get_roster(data_dir, rows, seed=0):
+    """Return the path of a generated roster, generating it on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    output_path = os.path.join(data_dir, f"roster_{rows}_{seed}.xlsx")
+    if not os.path.exists(output_path):
+        print(f"Generating {rows} row roster: {output_path}")
+        generate_roster(output_path, rows, seed)
+    return output_path
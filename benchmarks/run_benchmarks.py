@@ -0,0 +1,193 @@
+"""
+Time the stages of the roster pipelines on synthetic rosters.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 1000000
+
+Every (pipeline, size) case runs in a fresh process so its peak RSS is not
+inflated by earlier cases. Results are written to a JSON file that can be
+compared across runs.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+from benchmarks.roster_generator import get_roster
+from instrumentation import peak_rss
+
+DEFAULT_DATA_DIR = "./benchmarks/data"
+DEFAULT_RESULTS_DIR = "./benchmarks/results"
+PIPELINES = ("transformation2", "merge_files")
+
+
+def run_stage(stages, name, func, *args):
+    """Run one pipeline stage and record its wall time and peak RSS"""
+    start = time.perf_counter()
+    result = func(*args)
+    stages.append(
+        {
+            "stage": name,
+            "seconds": round(time.perf_counter() - start, 4),
+            "peak_rss": peak_rss(),
+        }
+    )
+    return result
+
+
+def bench_transformation2(input_paths, work_dir):
+    import transformation2
+
+    mapping_schema = transformation2.mapping_schema
+    input_files = [{"path": path, "type": "excel"} for path in input_paths]
+    output_path = os.path.join(work_dir, "output.xlsx")
+
+    stages = []
+    data_stores = run_stage(
+        stages,
+        "read",
+        transformation2.read_input_files,
+        input_files,
+        mapping_schema,
+        transformation2.PARALLEL_WORKERS,
+    )
+    merged_data_store = run_stage(
+        stages, "merge", transformation2.merge_data_stores, data_stores
+    )
+    transformed_data_store = run_stage(
+        stages,
+        "transform",
+        transformation2.apply_transformations_to_data_store,
+        merged_data_store,
+        mapping_schema,
+    )
+    run_stage(
+        stages,
+        "write",
+        transformation2.write_output,
+        transformed_data_store,
+        mapping_schema,
+        transformation2.TEMPLATE_FILE.get("path"),
+        output_path,
+    )
+    return stages
+
+
+def bench_merge_files(input_paths, work_dir):
+    import merge_files
+
+    output_path = os.path.join(work_dir, "merged_input.xlsx")
+
+    stages = []
+    run_stage(stages, "validate", merge_files.validate_input_headers, input_paths)
+    # The inputs are read and the merged workbook written while merging
+    run_stage(
+        stages, "merge", merge_files.merge_input_files, input_paths, output_path
+    )
+    return stages
+
+
+BENCHMARKS = {
+    "transformation2": bench_transformation2,
+    "merge_files": bench_merge_files,
+}
+
+
+def run_case(pipeline, input_paths):
+    """Run one benchmark case. Meant to be called in a fresh process."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        stages = BENCHMARKS[pipeline](input_paths, work_dir)
+        total = time.perf_counter() - start
+    return {
+        "seconds": round(total, 4),
+        "peak_rss": peak_rss(),
+        "stages": stages,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, pipelines, files, data_dir):
+    """Run every pipeline on every roster size and return the results"""
+    runs = []
+    context = get_context("spawn")
+    for rows in sizes:
+        input_paths = [get_roster(data_dir, rows, seed) for seed in range(files)]
+        for pipeline in pipelines:
+            print(f"Running {pipeline} on {files} x {rows} rows...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_case, pipeline, input_paths).result()
+            result.update({"pipeline": pipeline, "rows": rows, "files": files})
+            runs.append(result)
+            for stage in result["stages"]:
+                # peak_rss is None where it can't be measured
+                rss = stage["peak_rss"]
+                print(
+                    f"  {stage['stage']:<10} {stage['seconds']:>10.3f}s"
+                    f"  peak RSS {f'{rss / 2**20:,.1f} MiB' if rss is not None else 'n/a'}"
+                )
+    return {
+        "started": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": runs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="Rows per input file (default: 1000 10000)",
+    )
+    parser.add_argument(
+        "--pipelines",
+        nargs="+",
+        choices=PIPELINES,
+        default=list(PIPELINES),
+    )
+    parser.add_argument(
+        "--files", type=int, default=2, help="Number of input files per run"
+    )
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument(
+        "--output",
+        help="Results JSON path (default: benchmarks/results/<timestamp>.json)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.pipelines, args.files, args.data_dir)
+
+    output_path = args.output
+    if not output_path:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output_path = os.path.join(DEFAULT_RESULTS_DIR, f"bench-{timestamp}.json")
+    with open(output_path, "w") as file:
+        json.dump(results, file, indent=4)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
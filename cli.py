@@ -0,0 +1,110 @@
+"""
+Command line entry point for the roster tools.
+
+    python cli.py convert [INPUT ...] [--mapping PATH] [--template PATH] [--output PATH] [--reader NAME]
+                        [--batch-rows N]
+    python cli.py merge [INPUT ...] [--output-dir DIR]
+    python cli.py watch [--watch-dir DIR] [--workers N] [--once] ...
+
+Without inputs, convert and merge use the configured INPUT_FILES. convert
+reads .csv and .parquet inputs as CSV/Parquet, anything else as Excel. The
+pipeline modules are only imported by the command that runs, so the CLI
+starts quickly.
+"""
+import argparse
+import os
+import sys
+
+from workbook_readers import READER_BACKENDS
+
+
+def convert(args):
+    import transformation2
+    from tabular_sources import input_type_from_path
+
+    if not args.inputs:
+        output_file_path = transformation2.process_files(
+            transformation2.read_mapping_schema(args.mapping),
+            args.reader,
+            args.batch_rows,
+            template_path=args.template,
+            output_file_path=args.output,
+        )
+        print(f"Output written to {output_file_path}")
+        return 0
+
+    mapping_schema = transformation2.read_mapping_schema(args.mapping)
+    template_path = args.template or transformation2.TEMPLATE_FILE.get("path")
+    output_file_path = args.output
+    if output_file_path is None:
+        os.makedirs(transformation2.OUTPUT_PATH, exist_ok=True)
+        output_file_path = transformation2.get_next_available_filename(
+            transformation2.OUTPUT_PATH
+        )
+    input_files = [{"path": path, "type": input_type_from_path(path)} for path in args.inputs]
+    transformation2.run_job(
+        input_files, mapping_schema, template_path, output_file_path, args.reader, args.batch_rows
+    )
+    print(f"Output written to {output_file_path}")
+    return 0
+
+
+def merge(args):
+    import merge_files
+
+    output_path = merge_files.process_input_files(
+        args.inputs or None, args.output_dir or merge_files.MERGED_OUTPUT_DIR
+    )
+    return 0 if output_path else 1
+
+
+def watch(args):
+    import roster_daemon
+
+    roster_daemon.main(args.daemon_args)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Roster conversion tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="Convert input rosters to the output template")
+    convert_parser.add_argument("inputs", nargs="*", help="Default: the configured INPUT_FILES")
+    convert_parser.add_argument("--mapping", default=None, help="Mapping schema JSON")
+    convert_parser.add_argument("--template", default=None, help="Output template workbook")
+    convert_parser.add_argument("--output", default=None, help="Output workbook path")
+    convert_parser.add_argument(
+        "--reader",
+        choices=READER_BACKENDS,
+        default=None,
+        help="Reader backend for input workbooks (default: READER_BACKEND)",
+    )
+    convert_parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=None,
+        help="Stream the rows through the batch pipeline in batches of this size (default: BATCH_ROWS)",
+    )
+    convert_parser.set_defaults(func=convert)
+
+    merge_parser = commands.add_parser("merge", help="Merge input workbooks with the same headers")
+    merge_parser.add_argument("inputs", nargs="*", help="Default: the configured INPUT_FILES")
+    merge_parser.add_argument("--output-dir", default=None, help="Default: MERGED_OUTPUT_DIR")
+    merge_parser.set_defaults(func=merge)
+
+    watch_parser = commands.add_parser(
+        "watch", help="Run the watch-folder daemon (options as for roster_daemon.py)"
+    )
+    watch_parser.set_defaults(func=watch)
+
+    # The daemon parses its own options
+    args, daemon_args = parser.parse_known_args(argv)
+    if args.command != "watch" and daemon_args:
+        parser.error(f"unrecognized arguments: {' '.join(daemon_args)}")
+    args.daemon_args = daemon_args
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Column-at-a-time execution of element-wise transformations.
+
+Roster columns repeat a small set of values (classifications, equipment,
+defaults), so each transformation runs once per distinct value and the
+results are broadcast back over the column. Columns of mostly distinct values
+(names) can't save any calls that way, so a sample of every column is checked
+first and those run through the per-value function. When NumPy/pandas are installed
+the factorize and broadcast steps run in pandas/NumPy (or Arrow compute for
+Arrow columns), otherwise a plain dict is used. Constant columns run the
+function once, split columns run it on each child column, and results that
+are lists of equal length (split_name) come back as a SplitColumn. Columns
+that don't fit the fast path (mixed types for string-only functions) fall
+back to the original per-value functions.
+"""
+
+from columns import (
+    ArrowColumn,
+    ConstantColumn,
+    SplitColumn,
+    arrow_array,
+    is_column,
+    load_arrow,
+    make_column,
+    to_list,
+)
+
+# Columns whose sample has more distinct values than this fraction run per value
+MAX_DISTINCT_RATIO = 0.5
+# Values sampled (evenly spaced) from a column to estimate its distinct ratio
+DISTINCT_SAMPLE_SIZE = 2048
+
+# NumPy/pandas, imported by load_pandas the first time a column is factorized
+np = None
+pd = None
+pandas_checked = False
+
+
+def load_pandas():
+    """The pandas module, or None if NumPy/pandas aren't installed"""
+    global np, pd, pandas_checked
+    if not pandas_checked:
+        pandas_checked = True
+        try:
+            import numpy
+            import pandas
+        except ImportError:  # NumPy/pandas are optional
+            pass
+        else:
+            np = numpy
+            pd = pandas
+    return pd
+
+
+def is_string_column(data):
+    return all(isinstance(value, str) for value in data)
+
+
+def is_flat_column(data):
+    return not any(isinstance(value, list) for value in data)
+
+
+def is_arrow_string_column(data):
+    return load_arrow().types.is_string(data.array.type) and data.array.null_count == 0
+
+
+def mostly_distinct(data):
+    """Whether an evenly spaced sample of the column is mostly distinct values"""
+    sample = data[:: max(len(data) // DISTINCT_SAMPLE_SIZE, 1)]
+    return len(set(sample)) > MAX_DISTINCT_RATIO * len(sample)
+
+
+def factorize(data):
+    """Distinct values of a column and the index of every value into them"""
+    if isinstance(data, ArrowColumn):
+        compute = load_arrow().compute
+        uniques = compute.unique(data.array)
+        return uniques.to_pylist(), compute.index_in(data.array, value_set=uniques)
+
+    if is_string_column(data) and load_pandas() is not None:
+        codes, uniques = pd.factorize(np.asarray(to_list(data), dtype=object))
+        return uniques, codes
+
+    # Key on type as well as value so 1, 1.0 and True stay distinct
+    positions = {}
+    uniques = []
+    codes = []
+    for value in data:
+        key = (value.__class__, value)
+        try:
+            codes.append(positions[key])
+        except KeyError:
+            codes.append(positions.setdefault(key, len(uniques)))
+            uniques.append(value)
+    return uniques, codes
+
+
+def take(results, codes):
+    """The column of results[code] for every code"""
+    if isinstance(codes, ConstantColumn):
+        return ConstantColumn(results[codes.value], len(codes))
+    if isinstance(codes, list):
+        return make_column([results[code] for code in codes])
+    if np is not None and isinstance(codes, np.ndarray):
+        values = np.empty(len(results), dtype=object)
+        for i, result in enumerate(results):
+            values[i] = result
+        return make_column(values.take(codes).tolist())
+
+    # Indices into the distinct values of an Arrow column
+    array = arrow_array(results)
+    if array is not None:
+        return ArrowColumn(load_arrow().compute.take(array, codes))
+    return [results[code] for code in codes.to_pylist()]
+
+
+def broadcast(results, codes):
+    """
+    Spread per-distinct-value results over the column. Results that are all
+    lists of the same length become one child column per list position.
+    """
+    if (
+        results
+        and all(isinstance(result, list) for result in results)
+        and len({len(result) for result in results}) == 1
+    ):
+        return SplitColumn(
+            broadcast([result[i] for result in results], codes)
+            for i in range(len(results[0]))
+        )
+    return take(results, codes)
+
+
+def apply_unique(func, data, params=()):
+    """Apply func once per distinct value of data and broadcast the results"""
+    uniques, codes = factorize(data)
+    return broadcast([func(value, *params) for value in uniques], codes)
+
+
+def vectorize(func, strings_only=False):
+    """
+    Wrap a per-value transformation so whole columns run through apply_unique.
+    strings_only restricts the fast path to all-string columns, so functions
+    that fail on other types still fail the same way through the fallback.
+    """
+
+    def column_func(data, *params):
+        if isinstance(data, SplitColumn):
+            # Per-value functions recurse into the parts, so run on each part
+            return SplitColumn(column_func(child, *params) for child in data.children)
+        if is_column(data) and len(data):
+            if isinstance(data, ConstantColumn):
+                value = data.value
+                if isinstance(value, str) if strings_only else not isinstance(value, list):
+                    return broadcast([func(value, *params)], ConstantColumn(0, len(data)))
+            elif isinstance(data, ArrowColumn):
+                if (not strings_only or is_arrow_string_column(data)) and not mostly_distinct(data):
+                    return apply_unique(func, data, params)
+            else:
+                eligible = is_string_column(data) if strings_only else is_flat_column(data)
+                if eligible and not mostly_distinct(data):
+                    return apply_unique(func, data, params)
+        return func(to_list(data), *params)
+
+    column_func.__name__ = func.__name__
+    column_func.__doc__ = func.__doc__
+    return column_func
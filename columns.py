@@ -0,0 +1,233 @@
+"""
+Column types for the data store.
+
+A data store maps field names to single values or columns. Columns used to be
+plain lists; these read-only Sequence types hold the same values with less
+memory:
+
+    ConstantColumn  one value repeated, e.g. a default (stored once)
+    ChunkedColumn   columns of several files concatenated without copying
+    SplitColumn     multi-part values (split_name) stored as one child column
+                    per part; row i is still the list [part0[i], part1[i], ...]
+    ArrowColumn     str/int values in a typed Arrow buffer (optional backend)
+
+Plain lists remain valid columns, so code that accepts a column should test
+is_column(data) instead of isinstance(data, list), and code that needs a
+real list (per-value transformations) should call to_list(data).
+"""
+from bisect import bisect_right
+from collections.abc import Sequence
+from itertools import accumulate, chain, repeat
+
+# "python" keeps read values in lists, "arrow" stores str/int columns in Arrow
+# buffers when pyarrow is installed
+COLUMN_BACKEND = "python"
+
+# pyarrow, imported by load_arrow the first time Arrow is needed
+pa = None
+arrow_checked = False
+
+
+def load_arrow():
+    """The pyarrow module (with pyarrow.compute loaded), or None if it isn't installed"""
+    global pa, arrow_checked
+    if not arrow_checked:
+        arrow_checked = True
+        try:
+            import pyarrow
+            import pyarrow.compute
+        except ImportError:  # Arrow is optional
+            pass
+        else:
+            pa = pyarrow
+    return pa
+
+
+class Column(Sequence):
+    """Base class of the read-only column types"""
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get(i) for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("column index out of range")
+        return self.get(index)
+
+    def get(self, index):
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        if isinstance(other, (list, Column)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class ConstantColumn(Column):
+    __slots__ = ("value", "length")
+
+    def __init__(self, value, length):
+        self.value = value
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def get(self, index):
+        return self.value
+
+    def __iter__(self):
+        return repeat(self.value, self.length)
+
+    def __repr__(self):
+        return f"ConstantColumn({self.value!r}, {self.length})"
+
+
+class ChunkedColumn(Column):
+    __slots__ = ("chunks", "offsets")
+
+    def __init__(self, chunks):
+        self.chunks = tuple(chunk for chunk in chunks if len(chunk))
+        # Start index of every chunk, plus the total length
+        self.offsets = [0, *accumulate(len(chunk) for chunk in self.chunks)]
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def get(self, index):
+        chunk_idx = bisect_right(self.offsets, index) - 1
+        return self.chunks[chunk_idx][index - self.offsets[chunk_idx]]
+
+    def __iter__(self):
+        return chain.from_iterable(self.chunks)
+
+
+class SplitColumn(Column):
+    __slots__ = ("children",)
+
+    def __init__(self, children):
+        self.children = tuple(children)
+
+    def __len__(self):
+        return len(self.children[0]) if self.children else 0
+
+    def get(self, index):
+        return [child[index] for child in self.children]
+
+    def __iter__(self):
+        return map(list, zip(*self.children))
+
+
+class ArrowColumn(Column):
+    __slots__ = ("array",)
+
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def get(self, index):
+        return self.array[index].as_py()
+
+    def __iter__(self):
+        if isinstance(self.array, load_arrow().ChunkedArray):
+            return chain.from_iterable(chunk.to_pylist() for chunk in self.array.chunks)
+        return iter(self.array.to_pylist())
+
+
+def is_column(data):
+    return isinstance(data, (list, Column))
+
+
+def to_list(data):
+    """A column as a plain list (single values are returned unchanged)"""
+    if isinstance(data, Column):
+        return list(data)
+    return data
+
+
+def arrow_array(values):
+    """
+    Values as an Arrow array if they are all str (or all int) and None, else None.
+    Other types are left out because Arrow would coerce them (int to float,
+    naive datetimes to timestamps, ...) and change what the cells get.
+    """
+    value_type = None
+    for value in values:
+        if value is None:
+            continue
+        if value_type is None:
+            value_type = type(value)
+            if value_type not in (str, int):
+                return None
+        elif type(value) is not value_type:
+            return None
+    if value_type is None or load_arrow() is None:
+        return None
+    return pa.array(values, type=pa.string() if value_type is str else pa.int64())
+
+
+def make_column(values):
+    """Store a list of read values with the configured backend"""
+    if COLUMN_BACKEND == "arrow" and values and load_arrow() is not None:
+        array = arrow_array(values)
+        if array is not None:
+            return ArrowColumn(array)
+    return values
+
+
+def concat_columns(parts):
+    """
+    Concatenate the data of one field from several data stores without copying
+    the values. Single values become one-row chunks, like list.append did.
+    """
+    chunks = []
+    for data in parts:
+        if isinstance(data, ChunkedColumn):
+            chunks.extend(data.chunks)
+        elif is_column(data):
+            if len(data):
+                chunks.append(data)
+        else:
+            chunks.append([data])
+
+    if not chunks:
+        return []
+    if len(chunks) == 1:
+        return chunks[0]
+
+    first = chunks[0]
+    if all(isinstance(chunk, ConstantColumn) for chunk in chunks) and all(
+        chunk.value == first.value and type(chunk.value) is type(first.value)
+        for chunk in chunks
+    ):
+        return ConstantColumn(first.value, sum(len(chunk) for chunk in chunks))
+    if all(isinstance(chunk, SplitColumn) for chunk in chunks) and len(
+        {len(chunk.children) for chunk in chunks}
+    ) == 1:
+        return SplitColumn(
+            concat_columns([chunk.children[i] for chunk in chunks])
+            for i in range(len(first.children))
+        )
+    if all(isinstance(chunk, ArrowColumn) for chunk in chunks) and len(
+        {chunk.array.type for chunk in chunks}
+    ) == 1:
+        pa = load_arrow()
+        arrays = []
+        for chunk in chunks:
+            if isinstance(chunk.array, pa.ChunkedArray):
+                arrays.extend(chunk.array.chunks)
+            else:
+                arrays.append(chunk.array)
+        return ArrowColumn(pa.chunked_array(arrays, type=first.array.type))
+    return ChunkedColumn(chunks)
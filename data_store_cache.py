@@ -0,0 +1,136 @@
+"""
+On-disk cache of validated per-file data stores.
+
+Entries are keyed by the content hash of the input file, the hash of the
+mapping plan it was read with and the reader and column backends, so a re-run only re-reads the input files that
+changed (or all of them if the mapping changed). Data stores are pickled and
+zlib-compressed, one file per entry. The cache is bounded in size: the least
+recently used entries are evicted once the total exceeds max_bytes.
+
+Entries are unpickled straight from disk, and unpickling can run arbitrary
+code, so the cache directory must only be writable by trusted users.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+
+import columns
+
+# Bump when the read/validate code changes what a data store holds or how
+# values are validated, so stale entries are never used.
+# 2: typed column objects instead of lists
+# 3: validation in the read pass (resolve_column)
+CACHE_VERSION = 3
+ENTRY_SUFFIX = ".datastore"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path):
+    """sha256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DataStoreCache:
+    def __init__(self, cache_dir, max_bytes=256 * 2**20, compress_level=1):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, input_path, plan_hash, reader=None, encoding=None):
+        """
+        Cache key of an input file read with the mapping plan of plan_hash by
+        the reader backend (and text encoding, for CSV), into columns of the
+        current columns.COLUMN_BACKEND
+        """
+        payload = (
+            f"{CACHE_VERSION}:{plan_hash}:{reader}:{encoding}:{columns.COLUMN_BACKEND}:"
+            f"{hash_file(input_path)}"
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """The cached data store for key, or None"""
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as file:
+                payload = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            data_store = pickle.loads(zlib.decompress(payload))
+        except Exception as e:
+            # Corrupt or stale (classes moved or changed since it was written)
+            print(f"Warning: Dropping unreadable cache entry {path}: {str(e)}")
+            self.remove(path)
+            return None
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data_store
+
+    def put(self, key, data_store):
+        """Store a data store under key and evict entries beyond max_bytes"""
+        payload = zlib.compress(
+            pickle.dumps(data_store, protocol=pickle.HIGHEST_PROTOCOL),
+            self.compress_level,
+        )
+        if len(payload) > self.max_bytes:
+            return
+        # Write to a temporary file first so concurrent runs never read a
+        # partially written entry
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(payload)
+            os.replace(temp_path, self.entry_path(key))
+        except BaseException:
+            self.remove(temp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        """(last used, size, path) of every entry"""
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self.remove(path)
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
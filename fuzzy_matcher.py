@@ -0,0 +1,135 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+
+# Marks a lookup miss, since a mapping's value may itself be None
+_MISSING = object()
+
+
+def normalize(text):
+    """Case-fold and collapse whitespace for the normalized exact-match lookup"""
+    return " ".join(text.split()).casefold()
+
+
+class FuzzyMatcher:
+    """
+    Prebuilt lookup for one value_mappings dictionary.
+
+    Resolution order:
+        1. Exact match on the key
+        2. Exact match on the normalized key (case and whitespace insensitive)
+        3. Fuzzy match, returning exactly what
+           difflib.get_close_matches(text, keys, n=1, cutoff=cutoff) would
+
+    Step 2 is a deliberate change from the difflib-only lookup data_mapper
+    used before: "  new   york" or "NEW YORK" now maps like "New York" even
+    where difflib would pick a different key or none at all. Inputs that
+    only differ from a key in case or whitespace therefore can resolve
+    differently than before; every other input resolves the same way.
+
+    The fuzzy step narrows candidates with a character n-gram index before
+    running SequenceMatcher. Keys are sorted by length so every posting list
+    can be cut down to the lengths that can still reach the cutoff, the
+    per-character overlap gives the same bound as SequenceMatcher.quick_ratio,
+    and candidates are scored best bound first so most never reach
+    SequenceMatcher at all.
+    Single characters are used as the grams because longer grams can miss
+    matches built from single-character blocks, and the results must stay
+    identical to difflib. Resolved inputs are memoized in an LRU cache.
+    """
+
+    def __init__(self, value_mappings, cutoff=0.75, memo_size=4096):
+        if not 0.0 < cutoff <= 1.0:
+            raise ValueError(f"cutoff must be in (0.0, 1.0]: {cutoff}")
+        self.cutoff = cutoff
+        self.mappings = {str(k): v for k, v in value_mappings.items()}
+
+        self.normalized = {}
+        for key, value in self.mappings.items():
+            self.normalized.setdefault(normalize(key), value)
+
+        # Candidate index: keys ordered by length, and for every character a
+        # list of levels, where level n holds the (ascending) indexes of the
+        # keys containing that character more than n times
+        self.keys = sorted(self.mappings, key=len)
+        self.lengths = [len(key) for key in self.keys]
+        self.postings = {}
+        for key_idx, key in enumerate(self.keys):
+            for char, count in Counter(key).items():
+                levels = self.postings.setdefault(char, [])
+                while len(levels) < count:
+                    levels.append([])
+                for level in levels[:count]:
+                    level.append(key_idx)
+
+        self.resolve = lru_cache(maxsize=memo_size)(self._resolve)
+
+    def _resolve(self, text):
+        value = self.mappings.get(text, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = self.normalized.get(normalize(text), _MISSING)
+        if value is not _MISSING:
+            return value
+
+        match = self.best_match(text)
+        if match is not None:
+            return self.mappings[match]
+        return text
+
+    def length_window(self, text_length):
+        """Index range of keys whose length can still reach the cutoff"""
+        cutoff = self.cutoff
+        min_length = int(text_length * cutoff / (2.0 - cutoff)) - 1
+        max_length = int(text_length * (2.0 - cutoff) / cutoff) + 1
+        return bisect_left(self.lengths, min_length), bisect_right(self.lengths, max_length)
+
+    def candidates(self, text):
+        """Yield (key, upper bound ratio) for keys that may reach the cutoff"""
+        text_length = len(text)
+        lo, hi = self.length_window(text_length)
+        if lo >= hi:
+            return
+
+        # Count matching characters per key, same as SequenceMatcher.quick_ratio.
+        # A key shares min(text count, key count) of a character, which is the
+        # number of that character's first text-count levels it appears in.
+        postings = []
+        for char, text_count in Counter(text).items():
+            for level in self.postings.get(char, ())[:text_count]:
+                postings.append(level[bisect_left(level, lo):bisect_left(level, hi)])
+        overlap = Counter(chain.from_iterable(postings))
+
+        # The overlap never exceeds the shorter length, so this bound also
+        # covers SequenceMatcher.real_quick_ratio
+        cutoff = self.cutoff
+        lengths = self.lengths
+        for key_idx, matches in overlap.items():
+            bound = 2.0 * matches / (text_length + lengths[key_idx])
+            if bound >= cutoff:
+                yield self.keys[key_idx], bound
+
+    def best_match(self, text):
+        """Best key at or above the cutoff, or None"""
+        from difflib import SequenceMatcher
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(text)
+        best = None
+        # Score the most promising candidates first so the rest can be cut
+        # off as soon as their upper bound drops below the best score
+        for bound, key in sorted(
+            ((bound, key) for key, bound in self.candidates(text)), reverse=True
+        ):
+            if best is not None and bound < best[0]:
+                break
+            # Can't beat the current best, even if the ratio equals the bound
+            if best is not None and (bound, key) < best:
+                continue
+            matcher.set_seq1(key)
+            score = matcher.ratio()
+            if score >= self.cutoff and (best is None or (score, key) > best):
+                best = (score, key)
+        return best[1] if best is not None else None
@@ -0,0 +1,251 @@
+"""
+Structured timing and memory instrumentation for roster jobs.
+
+A job is recorded between start_job and finish_job (or inside profile_job).
+Code under measurement opens nested measure blocks, e.g. a pipeline stage,
+a mapping field inside it and a transformation inside that. Every block is
+aggregated by its path (["transform", "First Name", "split_name"]) with its call
+count, wall time, rows processed and memory, so a slow field or transform
+stands out in the report without attaching a debugger.
+
+Memory is the process peak RSS at the end of the block. With trace_memory
+the net and peak Python allocations of every block are recorded as well
+(tracemalloc), and with cprofile the whole job runs under cProfile and the
+hottest functions are added to the report. Both slow the job down and are
+off by default.
+
+When no job is active, measure does nothing beyond entering and leaving
+the block. Work done in other processes (e.g. parallel input reads) is only
+seen as the time spent waiting for it.
+"""
+import io
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from columns import is_column
+
+# The job currently being recorded, if any
+_active_job = None
+
+# Number of functions listed from cProfile
+PROFILE_TOP_FUNCTIONS = 30
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes. Without the POSIX-only
+    resource module this uses psutil if it's installed, otherwise None.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        # peak_wset is the peak working set on Windows
+        return getattr(memory, "peak_wset", memory.rss)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_rows(data):
+    """Number of values in a field's data (1 for single values)"""
+    return len(data) if is_column(data) else 1
+
+
+class Measurement:
+    """An open measure block. Set rows when it's only known inside the block."""
+
+    __slots__ = ("kind", "path", "rows", "start", "start_traced", "peak_traced")
+
+    def __init__(self, kind, path, rows):
+        self.kind = kind
+        self.path = path
+        self.rows = rows
+        self.start = None
+        self.start_traced = 0
+        self.peak_traced = 0
+
+
+class JobProfile:
+    """Aggregated measurements of one job"""
+
+    def __init__(self, job_name, cprofile=False, trace_memory=False):
+        self.job_name = job_name
+        self.started = datetime.now(timezone.utc).isoformat()
+        self.seconds = None
+        self.entries = {}
+        self.stack = []
+        self.trace_memory = trace_memory
+        self.profiler = None
+        if cprofile:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+        self._start = None
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.seconds = time.perf_counter() - self._start
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def enter(self, measurement):
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak is reset for the new block, so hand the peak seen so
+            # far to the enclosing block first
+            if self.stack:
+                parent = self.stack[-1]
+                parent.peak_traced = max(parent.peak_traced, peak)
+            tracemalloc.reset_peak()
+            measurement.start_traced = current
+            measurement.peak_traced = current
+        self.stack.append(measurement)
+        measurement.start = time.perf_counter()
+
+    def exit(self, measurement):
+        seconds = time.perf_counter() - measurement.start
+        self.stack.pop()
+
+        entry = self.entries.get(measurement.path)
+        if entry is None:
+            entry = self.entries[measurement.path] = {
+                "path": list(measurement.path),
+                "kind": measurement.kind,
+                "calls": 0,
+                "seconds": 0.0,
+                "rows": 0,
+                "peak_rss": 0,
+            }
+            if self.trace_memory:
+                entry["allocated_bytes"] = 0
+                entry["peak_traced_bytes"] = 0
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["rows"] += measurement.rows or 0
+        entry["peak_rss"] = max(entry["peak_rss"], peak_rss() or 0)
+
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(measurement.peak_traced, peak)
+            entry["allocated_bytes"] += current - measurement.start_traced
+            entry["peak_traced_bytes"] = max(
+                entry["peak_traced_bytes"], peak - measurement.start_traced
+            )
+            if self.stack:
+                parent = self.stack[-1]
+                parent.peak_traced = max(parent.peak_traced, peak)
+
+    def top_functions(self, limit=PROFILE_TOP_FUNCTIONS):
+        """The functions with the most cumulative time under cProfile"""
+        import pstats
+
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        stats.sort_stats("cumulative")
+        functions = []
+        for func in stats.fcn_list[:limit]:
+            calls, primitive_calls, own_time, cumulative_time, callers = stats.stats[func]
+            filename, line, name = func
+            functions.append(
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "own_seconds": round(own_time, 6),
+                    "cumulative_seconds": round(cumulative_time, 6),
+                }
+            )
+        return functions
+
+    def report(self):
+        """The job's measurements as a JSON-serializable dict"""
+        entries = []
+        for entry in self.entries.values():
+            entry = dict(entry)
+            entry["seconds"] = round(entry["seconds"], 6)
+            entries.append(entry)
+        report = {
+            "job": self.job_name,
+            "started": self.started,
+            "seconds": round(self.seconds, 6) if self.seconds is not None else None,
+            "peak_rss": peak_rss(),
+            "entries": entries,
+        }
+        if self.profiler is not None:
+            report["profile"] = self.top_functions()
+        return report
+
+    def write_report(self, report_path):
+        """Write the JSON report, and the raw cProfile stats next to it (.prof)"""
+        with open(report_path, "w") as file:
+            json.dump(self.report(), file, indent=4)
+        if self.profiler is not None:
+            self.profiler.dump_stats(f"{report_path.rsplit('.', 1)[0]}.prof")
+
+
+def start_job(job_name, cprofile=False, trace_memory=False):
+    """Start recording a job. Measurements from now on go to its profile."""
+    global _active_job
+    if _active_job is not None:
+        raise ValueError(f"Job {_active_job.job_name} is already being profiled")
+    _active_job = JobProfile(job_name, cprofile=cprofile, trace_memory=trace_memory)
+    _active_job.start()
+    return _active_job
+
+
+def finish_job():
+    """Stop recording the active job and return its profile"""
+    global _active_job
+    job, _active_job = _active_job, None
+    if job is not None:
+        job.stop()
+    return job
+
+
+@contextmanager
+def profile_job(job_name, report_path=None, cprofile=False, trace_memory=False):
+    """Record a job for the duration of the block, writing the report if a path is given"""
+    job = start_job(job_name, cprofile=cprofile, trace_memory=trace_memory)
+    try:
+        yield job
+    finally:
+        finish_job()
+        if report_path:
+            job.write_report(report_path)
+
+
+@contextmanager
+def measure(kind, name, rows=None):
+    """
+    Measure a block as part of the active job, nested under any open blocks.
+    kind labels the entry (stage, file, field, transformation, ...).
+    """
+    job = _active_job
+    if job is None:
+        yield None
+        return
+
+    parent_path = job.stack[-1].path if job.stack else ()
+    measurement = Measurement(kind, parent_path + (str(name),), rows)
+    job.enter(measurement)
+    try:
+        yield measurement
+    finally:
+        job.exit(measurement)
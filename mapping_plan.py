@@ -0,0 +1,208 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict, namedtuple
+
+
+# Compiled plans, keyed by schema hash, least recently used first
+_plan_cache = OrderedDict()
+# Plans kept in _plan_cache; the least recently used is dropped beyond this
+PLAN_CACHE_SIZE = 32
+
+CELL_PATTERN = re.compile(r"^([A-Za-z]{1,3})(\d+|_)$")
+COLUMN_SPAN_PATTERN = re.compile(r"^([A-Za-z]{1,3}):([A-Za-z]{1,3})$")
+
+# A parsed cell or range. max_row is None for dynamic ranges ending in "_"
+CellRange = namedtuple("CellRange", "text min_col min_row max_col max_row")
+DestinationPlan = namedtuple(
+    "DestinationPlan", "sheet ranges format conditional_format merge"
+)
+FieldPlan = namedtuple(
+    "FieldPlan",
+    [
+        "index",
+        "field_name",
+        "source_sheet",
+        "source_range",
+        "source_column",
+        "default",
+        "reference_field",
+        "validations",
+        "is_required",
+        "allows_none",
+        "transformations",
+        "destinations",
+    ],
+)
+MappingPlan = namedtuple(
+    "MappingPlan", "schema_hash fields fields_by_name default_formats schema"
+)
+
+
+class Transformation(namedtuple("Transformation", "name func params")):
+    """A transformation function resolved from the registry with its params bound"""
+
+    __slots__ = ()
+
+    def __call__(self, data):
+        return self.func(data, *self.params)
+
+
+def is_dynamic(cell_range):
+    return cell_range.max_row is None
+
+
+def is_single_cell(cell_range):
+    return ":" not in cell_range.text
+
+
+def parse_cell(cell):
+    """Split a cell reference like 'AA25' or 'B_' into (column index, row or None)"""
+    match = CELL_PATTERN.match(cell.strip())
+    if not match:
+        raise ValueError(f"Invalid cell reference: {cell}")
+    # openpyxl is imported here so importing the plan module stays cheap
+    from openpyxl.utils import column_index_from_string
+
+    col_letter, row = match.groups()
+    return column_index_from_string(col_letter.upper()), (
+        None if row == "_" else int(row)
+    )
+
+
+def parse_range(cell_range):
+    """
+    Parse a mapping range into a CellRange.
+    Supports single cells ('B3'), fixed ranges ('A6:A15') and dynamic
+    ranges ending in '_' ('D2:D_'), including multi-letter columns.
+    """
+    cell_range = cell_range.strip()
+    if ":" in cell_range:
+        start_cell, end_cell = cell_range.split(":")
+        min_col, min_row = parse_cell(start_cell)
+        max_col, max_row = parse_cell(end_cell)
+        if min_row is None:
+            raise ValueError(f"Range must start on a fixed row: {cell_range}")
+    else:
+        min_col, min_row = parse_cell(cell_range)
+        max_col, max_row = min_col, min_row
+    return CellRange(cell_range, min_col, min_row, max_col, max_row)
+
+
+def parse_column_span(cell_range):
+    """(min column, max column) of a whole-column range like 'C:E', or None for other ranges"""
+    match = COLUMN_SPAN_PATTERN.match(cell_range.strip())
+    if not match:
+        return None
+    from openpyxl.utils import column_index_from_string
+
+    return tuple(column_index_from_string(col.upper()) for col in match.groups())
+
+
+def parse_transformation(transformation, functions):
+    """Resolve a transformation string like 'data_mapper(classification)'"""
+    func_name = transformation
+    params = []
+
+    # Check if transformation has parameters
+    if "(" in transformation:
+        func_name = transformation.split("(")[0]
+        params_str = transformation.split("(")[1].rstrip(")")
+        params = [param.strip() for param in params_str.split(",") if param.strip()]
+
+    func = functions.get(func_name)
+    if not func:
+        return None
+    return Transformation(func_name, func, tuple(params))
+
+
+def compile_field(index, mapping, functions):
+    validations = tuple(mapping.get("validation", []))
+    source = mapping.get("source")
+
+    transformations = []
+    for transformation in mapping.get("transformations", []):
+        compiled = parse_transformation(transformation, functions)
+        if compiled is None:
+            print(f"Warning: Unknown transformation '{transformation}' ignored")
+            continue
+        transformations.append(compiled)
+
+    destinations = []
+    for destination in mapping.get("destination", []):
+        destinations.append(
+            DestinationPlan(
+                sheet=destination["sheet"],
+                ranges=tuple(
+                    parse_range(cell_range)
+                    for cell_range in destination["range"].split(",")
+                ),
+                format=destination.get("format"),
+                conditional_format=destination.get("conditional_format"),
+                merge=destination.get("merge"),
+            )
+        )
+
+    source_range = parse_range(source["range"]) if source else None
+    source_column = source.get("column") if source else None
+    if source_column is not None and source_range.min_row < 2:
+        raise ValueError(
+            f"Source range of {mapping['field_name']} must start below the header row of column '{source_column}'"
+        )
+
+    return FieldPlan(
+        index=index,
+        field_name=mapping["field_name"],
+        source_sheet=source["sheet"] if source else None,
+        source_range=source_range,
+        source_column=source_column,
+        default=mapping.get("default"),
+        reference_field=mapping.get("reference_field"),
+        validations=validations if "validation" in mapping else None,
+        is_required=any(v.get("type") == "required" for v in validations),
+        allows_none=any(v.get("type") == "allow-empty" for v in validations),
+        transformations=tuple(transformations),
+        destinations=tuple(destinations),
+    )
+
+
+def hash_schema(mapping_schema):
+    """Stable hash of a mapping schema dict"""
+    payload = json.dumps(mapping_schema, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_plan(mapping_schema, schema_hash, functions):
+    fields = tuple(
+        compile_field(index, mapping, functions)
+        for index, mapping in enumerate(mapping_schema["mappings"])
+    )
+    fields_by_name = {}
+    for field in fields:
+        fields_by_name.setdefault(field.field_name, []).append(field)
+    return MappingPlan(
+        schema_hash=schema_hash,
+        fields=fields,
+        fields_by_name={name: tuple(f) for name, f in fields_by_name.items()},
+        default_formats=mapping_schema.get("default_formats", {}),
+        schema=mapping_schema,
+    )
+
+
+def compile_mapping_plan(mapping_schema, functions):
+    """
+    Compile a mapping schema dict into a MappingPlan.
+    Plans are cached by schema hash (the PLAN_CACHE_SIZE most recently
+    used), so repeated calls with the same schema only pay for hashing.
+    """
+    schema_hash = hash_schema(mapping_schema)
+    key = (schema_hash, id(functions))
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = build_plan(mapping_schema, schema_hash, functions)
+        _plan_cache[key] = plan
+        if len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    else:
+        _plan_cache.move_to_end(key)
+    return plan
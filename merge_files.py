@@ -1,9 +1,8 @@
 import json
-from openpyxl import load_workbook, Workbook
 import os
-from pathlib import Path
-import shutil
-from copy import copy  # Import the copy function
+
+# openpyxl and the workbook helpers are imported by the functions that use
+# them, so importing this module doesn't load them
 
 # Configuration that will later come from database
 # List of input files to be merged
@@ -12,13 +11,31 @@ INPUT_FILES = [
     {"path": "./roaster/input/input2.xlsx", "type": "excel"},
 ]
 
+# Directory the merged workbook is saved in
+MERGED_OUTPUT_DIR = "./roaster/input/merged"
+
+# Reader backend for the header rows (any backend of workbook_readers). The
+# data rows are always read with openpyxl-readonly, as merging copies their styles.
+HEADER_READER_BACKEND = "openpyxl-readonly"
+
 # Path to mapping schema that contains merge configuration
 mapping_file_path = "./mappings/roaster-mapping.json"
 
-# Load the merge configuration globally
-with open(mapping_file_path, "r") as file:
-    mapping_schema = json.load(file)
-merge_config = mapping_schema.get("merge_files", [{}])[0]
+def get_merge_config():
+    """The merge configuration from the mapping schema, loaded on first use"""
+    global mapping_schema, merge_config
+    if "merge_config" not in globals():
+        with open(mapping_file_path, "r") as file:
+            mapping_schema = json.load(file)
+        merge_config = mapping_schema.get("merge_files", [{}])[0]
+    return merge_config
+
+def __getattr__(name):
+    # merge_files.mapping_schema / merge_config load the mapping file on first access
+    if name in ("mapping_schema", "merge_config"):
+        get_merge_config()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_sheet(workbook, sheet_name):
     """
@@ -33,112 +50,189 @@ def get_sheet(workbook, sheet_name):
     print(f"Warning: Sheet '{sheet_name}' not found. Using active sheet as default.")
     return workbook.active
 
-def validate_template_format(workbooks):
+def read_header_row(input_path, reader=None):
+    """
+    Read only the header row of an input file with a reader backend (default:
+    HEADER_READER_BACKEND). With openpyxl-readonly the sheet XML is parsed in
+    read-only mode and parsing stops at the header row.
+    Trailing empty cells are dropped so sheets of different widths compare equal.
     """
-    Compare the headers and structure of workbooks to ensure they match.
-        Args: 
-            workbooks: List of loaded Excel workbooks
+    from workbook_readers import open_values_workbook
+
+    header_row = get_merge_config().get("header_row", 1)
+    wb = open_values_workbook(input_path, reader or HEADER_READER_BACKEND)
+    try:
+        sheet = get_sheet(wb, get_merge_config().get("sheet", "active"))
+        headers = list(
+            next(
+                sheet.iter_rows(min_row=header_row, max_row=header_row, values_only=True),
+                (),
+            )
+        )
+    finally:
+        wb.close()
+    while headers and headers[-1] is None:
+        headers.pop()
+    return headers
+
+def validate_input_headers(input_paths):
+    """
+    Pre-flight check that every input file has the headers of the first one,
+    reading nothing but the header rows. Every mismatching file is reported,
+    not just the first.
+        Args:
+            input_paths: Paths of the input files
         Returns:
-            bool: True if all workbooks have matching headers, False otherwise
+            bool: True if all files have matching headers, False otherwise
     """
-    if not workbooks:
+    if not input_paths:
         return False
 
     print("Validating template format...")
-    # Get which row contains headers (default is row 1) from json config file
-    header_row = merge_config.get("header_row", 1)
-
-    # Use first workbook's headers as reference for comparison
-    reference_wb = workbooks[0]
-    reference_sheet = get_sheet(reference_wb, merge_config.get("sheet", "active"))
-    reference_headers = [cell.value for cell in reference_sheet[header_row]]
+    reference_headers = read_header_row(input_paths[0])
     print(f"Reference headers: {reference_headers}")
 
-    # Compare each workbook's headers with reference
-    for wb in workbooks[1:]:
-        sheet = get_sheet(wb, merge_config.get("sheet", "active"))
-        current_headers = [cell.value for cell in sheet[header_row]]
-        print(f"Current headers: {current_headers}")
+    mismatches = []
+    for input_path in input_paths[1:]:
+        current_headers = read_header_row(input_path)
         if current_headers != reference_headers:
-            print("Headers do not match across files. The templates must be of different types.")
-            return False
+            mismatches.append((input_path, current_headers))
+
+    if mismatches:
+        print(f"Headers do not match in {len(mismatches)} file(s). The templates must be of different types.")
+        for input_path, current_headers in mismatches:
+            print(f"  {input_path}: {current_headers}")
+        return False
 
     print("All headers match.");
     return True
 
-def copy_sheet(source_sheet, target_sheet):
-    """
-    Copy all data, formatting, and formulas from source_sheet to target_sheet.
-    """
-    for row in source_sheet.iter_rows():
-        for cell in row:
-            new_cell = target_sheet.cell(row=cell.row, column=cell.column, value=cell.value)
-            if cell.has_style:
-                new_cell.font = copy(cell.font)
-                new_cell.border = copy(cell.border)
-                new_cell.fill = copy(cell.fill)
-                new_cell.number_format = copy(cell.number_format)
-                new_cell.protection = copy(cell.protection)
-                new_cell.alignment = copy(cell.alignment)
-
-def merge_workbooks(workbooks, template_path, output_file_path):
+def merge_input_files(input_paths, output_file_path):
     """
-    Merge multiple workbooks into a single workbook.Preserves headers from first workbook and concatenates all data rows.
+    Merge input files into a single workbook, opening the files to append one
+    at a time so only one of them is open while merging.
 
     Args:
-        workbooks: List of workbooks to merge
-        template_path: Path to the template file
+        input_paths: Paths of the files to merge, the first one is the reference
         output_file_path: Path to save the merged workbook
 
     Returns:
-        Workbook: New workbook containing merged data, or None if error
+        str: Path of the saved merged workbook, or None if error
     """
-    if not workbooks:
+    if not input_paths:
         return None
+    return write_merged_workbook(
+        input_paths[0], iter_workbooks(input_paths[1:]), output_file_path
+    )
+
+def iter_workbooks(input_paths):
+    """Open the input workbooks read-only one at a time, closing each before the next is opened"""
+    from openpyxl import load_workbook
+
+    for input_path in input_paths:
+        print(f"Loading workbook: {input_path}")
+        wb = load_workbook(input_path, read_only=True, data_only=True)
+        try:
+            yield wb
+        finally:
+            wb.close()
+
+def write_merged_workbook(template_path, workbooks, output_file_path):
+    """
+    Copy the template workbook and append the data rows of workbooks (any iterable).
+
+    The template is loaded once and copied entirely; the data rows of the
+    workbooks are streamed from them (read-only workbooks are read row by row)
+    and appended to its active sheet. The merged workbook is written in
+    write-only mode straight to output_file_path, and styles are carried over
+    once per distinct source style.
+
+    Returns:
+        str: Path of the saved merged workbook
+    """
+    from template_cache import load_template
+    from workbook_stream import (
+        clone_template_cell,
+        last_dimension_row,
+        row_values,
+        stream_template_sheet,
+        stream_workbook,
+        template_rows,
+    )
 
     print("Merging workbooks...")
 
-    # Create new workbook for merged data by copying the reference workbook
-    shutil.copy2(template_path, output_file_path)
-    merged_wb = load_workbook(output_file_path)
-    merged_sheet = merged_wb.active
+    # The reference workbook, with formulas, is the base of the merged workbook
+    template = load_template(template_path)
+    merged_wb = stream_workbook(template)
+
+    for template_sheet in template.worksheets:
+        merged_sheet = stream_template_sheet(merged_wb, template_sheet)
+        template_cells = template_rows(template_sheet)
+        for row_idx in range(1, template_sheet.max_row + 1):
+            merged_sheet.append(
+                row_values(
+                    {
+                        col_idx: clone_template_cell(merged_sheet, template_cell)
+                        for col_idx, template_cell in template_cells.get(row_idx, {}).items()
+                    }
+                )
+            )
+        current_row = template_sheet.max_row + 1
 
-    # Get row numbers for headers and data start
-    header_row = merge_config.get("header_row", 1)
-    data_start_row = merge_config.get("data_start_row", 2)
+        if template_sheet is template.active:
+            current_row = append_data_rows(
+                merged_sheet, template, workbooks, template_sheet.max_column, current_row
+            )
 
-    # Track where to insert next row in merged sheet
-    current_row = merged_sheet.max_row + 1
+        # Rows that only carry dimensions (e.g. a height) are written too
+        for row_idx in range(current_row, last_dimension_row(template_sheet) + 1):
+            merged_sheet.append([])
+
+    merged_wb.save(output_file_path)
+    print("Merging completed.")
+    return output_file_path
 
-    # Calculate the maximum number of columns filled with data
-    max_cols = merged_sheet.max_column
+def append_data_rows(merged_sheet, template, workbooks, max_cols, current_row):
+    """
+    Append the non-empty data rows of every workbook to the streamed merged sheet.
+    Returns the row after the last appended one.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from workbook_stream import StyleMapper
+
+    # Get row number for data start
+    data_start_row = get_merge_config().get("data_start_row", 2)
     print(f"Max columns: {max_cols}")
 
     # Merge data from all workbooks except the reference workbook
-    for wb in workbooks[1:]:
-        sheet = get_sheet(wb, merge_config.get("sheet", "active"))
-        max_row = sheet.max_row
-        print(f"Processing sheet: {sheet.title}, Max rows: {max_row}")
-
-        # Copy all non-empty data rows from current workbook
-        for row_idx in range(data_start_row, max_row + 1):
-            row = sheet[row_idx]
+    for wb in workbooks:
+        sheet = get_sheet(wb, get_merge_config().get("sheet", "active"))
+        if wb.read_only:
+            # Read every row present in the file, not the declared dimensions
+            sheet.reset_dimensions()
+        map_style = StyleMapper(wb, template)
+
+        # Copy all non-empty data rows from current workbook. The rows of a
+        # read-only sheet are only known once it has been read.
+        max_row = data_start_row - 1
+        for max_row, row in enumerate(sheet.iter_rows(min_row=data_start_row), start=data_start_row):
             if all(cell.value is None for cell in row):
                 continue  # Skip completely empty rows
-            for col_idx in range(1, max_cols + 1):
-                cell = sheet.cell(row=row_idx, column=col_idx)
-                new_cell = merged_sheet.cell(row=current_row, column=col_idx, value=cell.value)
-                if cell.has_style:
-                    new_cell.font = copy(cell.font)
-                    new_cell.border = copy(cell.border)
-                    new_cell.fill = copy(cell.fill)
-                    new_cell.number_format = copy(cell.number_format)
-                    new_cell.protection = copy(cell.protection)
-                    new_cell.alignment = copy(cell.alignment)
+            merged_row = []
+            for cell in row[:max_cols]:
+                style = map_style(cell)
+                if style is None:
+                    merged_row.append(cell.value)
+                    continue
+                new_cell = WriteOnlyCell(merged_sheet, value=cell.value)
+                new_cell._style = style
+                merged_row.append(new_cell)
+            merged_sheet.append(merged_row)
             current_row += 1
+        print(f"Processed sheet: {sheet.title}, Max rows: {max_row}")
 
-    print("Merging completed.")
-    return merged_wb
+    return current_row
 
 def get_next_available_filename(output_dir, base_name="merged_input", ext=".xlsx"):
     """
@@ -162,48 +256,45 @@ def get_next_available_filename(output_dir, base_name="merged_input", ext=".xlsx
             return filepath
         i += 1
 
-def process_input_files():
+def process_input_files(input_paths=None, output_dir=MERGED_OUTPUT_DIR):
     """
     Main function that:
-        1. Loads all input workbooks
-        2. Validates they have same template format
-        3. Merges them into single workbook
-        4. Saves merged workbook to output directory
+        1. Validates all input files have the same header row
+        2. Merges them into single workbook, opening one input at a time
+        3. Saves merged workbook to output directory
+    Args:
+        input_paths: Paths of the files to merge (default: INPUT_FILES)
+        output_dir: Directory to save the merged workbook in
     Returns:
         str: Path to merged file if successful, None if error
     """
     print("Processing input files...")
     
     # Create output directory if it doesn't exist
-    output_dir = "./roaster/input/merged"
     os.makedirs(output_dir, exist_ok=True)
 
-    # Load all input workbooks
-    workbooks = []
-    for input_file in INPUT_FILES:
-        try:
-            print(f"Loading workbook: {input_file['path']}")
-            wb = load_workbook(input_file["path"], data_only=True)
-            workbooks.append(wb)
-        except Exception as e:
-            print(f"Error loading {input_file['path']}: {e}")
+    if input_paths is None:
+        input_paths = [input_file["path"] for input_file in INPUT_FILES]
+    for input_path in input_paths:
+        if not os.path.exists(input_path):
+            print(f"Error loading {input_path}: file not found")
             return None
 
-    # First validate all workbooks have same format
-    if not validate_template_format(workbooks):
-        print("Error: Input files have different formats")
+    # First validate all files have the same format, reading only their header rows
+    try:
+        if not validate_input_headers(input_paths):
+            print("Error: Input files have different formats")
+            return None
+    except Exception as e:
+        print(f"Error reading headers: {e}")
         return None
 
-    # If validation passed, merge the workbooks
-    template_path = INPUT_FILES[0]["path"]
+    # If validation passed, merge the files one at a time
     output_path = get_next_available_filename(output_dir)
-    merged_wb = merge_workbooks(workbooks, template_path, output_path)
-    if not merged_wb:
+    if not merge_input_files(input_paths, output_path):
         print("Error: Failed to merge workbooks")
         return None
 
-    # Save merged workbook
-    merged_wb.save(output_path)
     print(f"Successfully merged input files to: {output_path}")
     return output_path
 
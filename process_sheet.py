@@ -1,39 +1,122 @@
+"""
+pandas engine for flat rosters.
+
+Every source sheet is read once, each mapping's source block is sliced out of
+it, transformed a whole column at a time with the pandas string methods and
+written to each destination range with a single to_excel call.
+"""
 import json
 import pandas as pd
 
+from mapping_plan import parse_range
+
 def load_mapping(mapping_file):
     with open(mapping_file, 'r') as file:
         return json.load(file)
 
-def apply_transformations(value, transformations, functions):
+def strings(column):
+    """The column with every value that isn't a str blanked, so the .str methods accept it"""
+    return column.where(column.map(type).eq(str))
+
+def split_name(column, separator=" "):
+    """First and last name parts, like transformation2.split_name (empty parts dropped, middle names skipped)"""
+    parts = strings(column).str.strip().str.split(separator).map(
+        lambda values: [value for value in values if value] if isinstance(values, list) else values
+    )
+    counts = parts.str.len()
+    # Text without any part gives "", values that aren't text stay in the first part
+    first = parts.str[0].where(parts.isna() | counts.gt(0), "").fillna(column)
+    last = parts.str[-1].where(parts.isna() | counts.gt(1), "")
+    return pd.concat([first, last], axis=1, ignore_index=True)
+
+def capitalize(column):
+    return strings(column).str.title().fillna(column)
+
+def uppercase(column):
+    return strings(column).str.upper().fillna(column)
+
+# Words title_case keeps lowercase unless they start or end the text
+SMALL_WORDS = {
+    "a", "an", "and", "as", "at", "but", "by", "for", "in",
+    "of", "on", "or", "the", "to", "via", "with",
+}
+
+def title_case_text(text):
+    words = text.lower().split()
+    if not words:
+        return text
+    return " ".join(
+        word.capitalize() if i == 0 or i == len(words) - 1 or word not in SMALL_WORDS else word
+        for i, word in enumerate(words)
+    )
+
+def title_case(column):
+    """Title case like transformation2.title_case (small words stay lowercase)"""
+    return strings(column).map(title_case_text, na_action="ignore").fillna(column)
+
+# Transformations on a Series, returning a Series (or a DataFrame with one
+# column per part for split_name)
+series_transformations = {
+    "split_name": split_name,
+    "capitalize": capitalize,
+    "uppercase": uppercase,
+    "title_case": title_case,
+}
+
+def apply_transformations(block, transformations, functions):
+    """Apply the transformations to every column of a source block"""
     for transformation in transformations:
-        if transformation == "capitalize":
-            value = value.title()
-        elif transformation == "split_name":
-            value = value.split(' ')
-        # Add more transformations as needed
-    return value
+        func = series_transformations.get(transformation)
+        if func is None:
+            print(f"Warning: transformation {transformation} is not supported by process_sheet, skipped")
+            continue
+        block = pd.concat([func(block[column]) for column in block.columns], axis=1, ignore_index=True)
+    return block
+
+def read_source_sheets(input_file, mappings):
+    """Every source sheet used by the mappings, read in one pass as an unlabelled frame"""
+    sheet_names = list(dict.fromkeys(map_item['source']['sheet'] for map_item in mappings))
+    return pd.read_excel(input_file, sheet_name=sheet_names, header=None, dtype=object)
+
+def source_block(sheets, source):
+    """The cells of a source range ('B3', 'B6:B15' or 'B6:B_') as a DataFrame"""
+    cell_range = parse_range(source['range'])
+    max_row = cell_range.max_row
+    return sheets[source['sheet']].iloc[
+        cell_range.min_row - 1:max_row,
+        cell_range.min_col - 1:cell_range.max_col,
+    ].reset_index(drop=True)
+
+def write_block(writer, block, dest):
+    """
+    Write a transformed block to a destination. Comma-separated ranges
+    ('A6:A15,B6:B15') take one column of the block each.
+    """
+    ranges = [parse_range(text) for text in dest['range'].split(',')]
+    parts = [block] if len(ranges) == 1 else [block.iloc[:, [i]] for i in range(min(len(ranges), block.shape[1]))]
+    for cell_range, part in zip(ranges, parts):
+        if cell_range.max_row is not None:
+            part = part.iloc[:cell_range.max_row - cell_range.min_row + 1]
+        part.to_excel(
+            writer,
+            sheet_name=dest['sheet'],
+            startrow=cell_range.min_row - 1,
+            startcol=cell_range.min_col - 1,
+            index=False,
+            header=False,
+        )
 
 def process_sheet(input_file, mapping_file, output_file):
     mapping = load_mapping(mapping_file)
-    writer = pd.ExcelWriter(output_file, engine='xlsxwriter')
-
-    for map_item in mapping['mappings']:
-        source_sheet = map_item['source']['sheet']
-        source_range = map_item['source']['range']
-        df = pd.read_excel(input_file, sheet_name=source_sheet, usecols=source_range)
+    sheets = read_source_sheets(input_file, mapping['mappings'])
 
-        for index, row in df.iterrows():
+    with pd.ExcelWriter(output_file) as writer:
+        for map_item in mapping['mappings']:
+            block = source_block(sheets, map_item['source'])
+            block = apply_transformations(block, map_item.get('transformations', []), mapping.get('functions', {}))
             for dest in map_item['destination']:
-                dest_sheet = dest['sheet']
-                dest_range = dest['range']
-                transformed_value = apply_transformations(row[map_item['field_name']], map_item['transformations'], mapping['functions'])
-                # Write transformed_value to the destination range in the output file
-                # This is a simplified example, you may need to handle ranges and multiple columns
-                df_dest = pd.DataFrame({map_item['field_name']: [transformed_value]})
-                df_dest.to_excel(writer, sheet_name=dest_sheet, startrow=index, startcol=0, index=False, header=False)
-
-    writer.save()
-
-# Example usage
-process_sheet('input.xlsx', 'mapping2.json', 'output.xlsx')
+                write_block(writer, block, dest)
+
+if __name__ == "__main__":
+    # Example usage
+    process_sheet('input.xlsx', 'mapping2.json', 'output.xlsx')
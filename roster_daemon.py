@@ -0,0 +1,244 @@
+"""
+Watch-folder batch daemon for roster conversions.
+
+Every roster set is a directory in the watch directory holding the input
+files (workbooks, CSV or Parquet) of one conversion. A set is picked up once
+it contains the READY_MARKER file, so half-copied sets are never processed;
+drop the inputs first and create the marker last:
+
+    roaster/input/storm-0412/crew1.xlsx
+    roaster/input/storm-0412/crew2.xlsx
+    roaster/input/storm-0412/READY
+
+Sets are converted on a pool of pre-warmed worker processes. Each worker
+imports transformation2 and builds the mapping plan, the fuzzy matchers and
+the parsed output template once, then keeps them for every set it converts. The output of a set is written to
+OUTPUT_PATH as <set name>.xlsx and the set is moved to processed/ (or to
+failed/, with the error in error.txt).
+
+Run from the repository root:
+    python roster_daemon.py --workers 4
+"""
+import argparse
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from tabular_sources import input_type_from_path
+
+# Configuration that will later come from database
+WATCH_DIR = "./roaster/input"
+READY_MARKER = "READY"
+PROCESSED_DIR = "processed"
+FAILED_DIR = "failed"
+INPUT_EXTENSIONS = (".xlsx", ".xlsm", ".csv", ".parquet", ".pq")
+DAEMON_WORKERS = 2
+POLL_INTERVAL = 2.0
+
+# transformation2, imported once per worker process by warm_worker
+transformation2 = None
+
+
+def warm_worker():
+    """Worker initializer: import the pipeline and build everything a job reuses"""
+    global transformation2
+    import transformation2 as module
+    from template_cache import load_template
+
+    transformation2 = module
+    plan = transformation2.get_mapping_plan(transformation2.mapping_schema)
+    template_path = transformation2.TEMPLATE_FILE.get("path")
+    if template_path and os.path.exists(template_path):
+        load_template(template_path)
+    for field in plan.fields:
+        for transformation in field.transformations:
+            if transformation.name == "data_mapper" and transformation.params:
+                transformation2.get_value_matcher(transformation.params[0])
+
+
+def worker_ready():
+    """No-op job used to start and warm every worker before the first set arrives"""
+    return os.getpid()
+
+
+def get_input_files(set_dir):
+    """Input files of a roster set, in name order"""
+    return [
+        {"path": os.path.join(set_dir, name), "type": input_type_from_path(name)}
+        for name in sorted(os.listdir(set_dir))
+        if name.lower().endswith(INPUT_EXTENSIONS) and not name.startswith("~$")
+    ]
+
+
+def convert_roster_set(set_dir, output_dir=None):
+    """
+    Convert one roster set in a worker. Returns the output file path.
+    output_dir defaults to the pipeline's OUTPUT_PATH.
+    """
+    input_files = get_input_files(set_dir)
+    if not input_files:
+        raise ValueError(f"No input workbooks found in {set_dir}")
+
+    output_dir = output_dir or transformation2.OUTPUT_PATH
+    os.makedirs(output_dir, exist_ok=True)
+    set_name = os.path.basename(set_dir)
+    output_file_path = transformation2.get_next_available_filename(
+        output_dir, base_name=set_name
+    )
+    transformation2.run_job(
+        input_files,
+        transformation2.mapping_schema,
+        transformation2.TEMPLATE_FILE.get("path"),
+        output_file_path,
+    )
+    return output_file_path
+
+
+def find_ready_sets(watch_dir):
+    """Roster set directories that have their ready marker"""
+    ready_sets = []
+    for entry in sorted(os.scandir(watch_dir), key=lambda entry: entry.name):
+        if not entry.is_dir() or entry.name in (PROCESSED_DIR, FAILED_DIR):
+            continue
+        if os.path.exists(os.path.join(entry.path, READY_MARKER)):
+            ready_sets.append(entry.path)
+    return ready_sets
+
+
+def archive_set(set_dir, watch_dir, target, error=None):
+    """Move a finished set out of the watch directory so it isn't picked up again"""
+    archive_dir = os.path.join(watch_dir, target)
+    os.makedirs(archive_dir, exist_ok=True)
+    destination = os.path.join(archive_dir, os.path.basename(set_dir))
+    if os.path.exists(destination):
+        destination = f"{destination}-{time.strftime('%Y%m%d%H%M%S')}"
+    shutil.move(set_dir, destination)
+    if error is not None:
+        with open(os.path.join(destination, "error.txt"), "w") as file:
+            file.write(error)
+    return destination
+
+
+def start_pool(workers):
+    """A worker pool whose workers have all been warmed up"""
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_worker)
+    # Start every worker now so the first sets don't pay for warming up
+    wait([executor.submit(worker_ready) for _ in range(workers)])
+    return executor
+
+
+def run_daemon(
+    watch_dir=WATCH_DIR,
+    output_dir=None,
+    workers=DAEMON_WORKERS,
+    poll_interval=POLL_INTERVAL,
+    once=False,
+):
+    """
+    Poll watch_dir for ready roster sets and convert them on the worker pool.
+    With once=True the daemon exits after converting the sets already there.
+
+    If a worker dies (e.g. out of memory), every set pending on the pool fails
+    with BrokenProcessPool. The pool is replaced by a new warm one and those
+    sets are converted again one at a time, so the set that kills a worker
+    on its own is the only one moved to failed/.
+    """
+    os.makedirs(watch_dir, exist_ok=True)
+
+    executor = start_pool(workers)
+    print(f"Watching {watch_dir} with {workers} warm workers")
+    pending = {}
+    # Sets pending when the pool broke, converted again without other sets in flight
+    retry = []
+    try:
+        while True:
+            broken = False
+            if retry:
+                to_submit = [] if pending else retry[:1]
+            else:
+                to_submit = [set_dir for set_dir in find_ready_sets(watch_dir) if set_dir not in pending]
+            for set_dir in to_submit:
+                try:
+                    future = executor.submit(convert_roster_set, set_dir, output_dir)
+                except BrokenProcessPool:
+                    # The pool broke since the last poll; the set is submitted again on the new one
+                    broken = True
+                    break
+                if retry:
+                    retry.remove(set_dir)
+                    print(f"Retrying roster set on its own: {set_dir}")
+                else:
+                    print(f"Queued roster set: {set_dir}")
+                pending[set_dir] = future
+
+            for set_dir, future in list(pending.items()):
+                if not future.done():
+                    continue
+                try:
+                    output_file_path = future.result()
+                except BrokenProcessPool:
+                    # Handled with the other sets of the broken pool below
+                    broken = True
+                    continue
+                except Exception as e:
+                    del pending[set_dir]
+                    error = "".join(traceback.format_exception(e))
+                    archived = archive_set(set_dir, watch_dir, FAILED_DIR, error)
+                    print(f"Error processing {set_dir}: {e} (moved to {archived})")
+                else:
+                    del pending[set_dir]
+                    archive_set(set_dir, watch_dir, PROCESSED_DIR)
+                    print(f"Converted {set_dir} to {output_file_path}")
+
+            if broken:
+                if len(pending) == 1:
+                    # The only set on the pool killed its worker
+                    set_dir = next(iter(pending))
+                    error = "A worker process died while converting this set (e.g. out of memory)\n"
+                    archived = archive_set(set_dir, watch_dir, FAILED_DIR, error)
+                    print(f"Error processing {set_dir}: worker died (moved to {archived})")
+                else:
+                    retry.extend(sorted(pending))
+                    print(f"A worker died; restarting the pool and retrying {len(pending)} roster sets")
+                pending.clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = start_pool(workers)
+                continue
+
+            if once and not pending and not retry and not find_ready_sets(watch_dir):
+                break
+            if pending:
+                wait(pending.values(), timeout=poll_interval, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(poll_interval)
+    finally:
+        executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a folder and convert roster sets")
+    parser.add_argument("--watch-dir", default=WATCH_DIR)
+    parser.add_argument("--output-dir", default=None, help="Default: transformation2 OUTPUT_PATH")
+    parser.add_argument("--workers", type=int, default=DAEMON_WORKERS)
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument(
+        "--once", action="store_true", help="Convert the sets that are ready and exit"
+    )
+    args = parser.parse_args(argv)
+    try:
+        run_daemon(
+            args.watch_dir,
+            args.output_dir,
+            workers=args.workers,
+            poll_interval=args.interval,
+            once=args.once,
+        )
+    except KeyboardInterrupt:
+        print("Stopping daemon")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+CSV and Parquet inputs read through the interface of a read-only openpyxl
+workbook, so stream_sources maps them exactly like Excel inputs.
+CSV files are decoded with CSV_ENCODING unless the input sets its own
+encoding (an "encoding" key in INPUT_FILES).
+
+A file is a single sheet that every source sheet name of the mapping reads.
+Row 1 is the header row (the CSV header line or the Parquet column names), so
+column letters are column positions: 'B2:B_' reads the second column. A
+mapping source can name the header instead with a "column" key. Rows are
+read one at a time (CSV) or one record batch at a time (Parquet).
+"""
+import csv
+import io
+import os
+
+from workbook_readers import ValuesSheet, ValuesWorkbook
+
+# Input file types by file extension. Anything else is read as Excel.
+INPUT_TYPES = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+TABULAR_TYPES = ("csv", "parquet")
+# Rows decoded per Parquet record batch
+PARQUET_BATCH_ROWS = 64 * 1024
+# Text encoding of CSV inputs (utf-8-sig also strips a UTF-8 byte order mark)
+CSV_ENCODING = "utf-8-sig"
+
+
+def input_type_from_path(path, default="excel"):
+    """The input type of a file from its extension"""
+    return INPUT_TYPES.get(os.path.splitext(str(path))[1].lower(), default)
+
+
+def csv_rows(source, delimiter=",", encoding=None, start=0):
+    """
+    CSV rows as tuples, with empty fields as None like empty cells.
+    A binary file-like source is read from position start and left open, so
+    it can be walked again.
+    """
+    encoding = encoding or CSV_ENCODING
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding=encoding) as file:
+            yield from decode_csv(file, delimiter)
+        return
+
+    source.seek(start)
+    file = io.TextIOWrapper(source, newline="", encoding=encoding)
+    try:
+        yield from decode_csv(file, delimiter)
+    finally:
+        # Closing the wrapper would close the caller's stream
+        file.detach()
+
+
+def decode_csv(file, delimiter=","):
+    for row in csv.reader(file, delimiter=delimiter):
+        yield tuple(value if value != "" else None for value in row)
+
+
+def parquet_rows(source, batch_size=PARQUET_BATCH_ROWS):
+    """The column names, then the rows of a Parquet file as tuples"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet inputs requires pyarrow") from None
+
+    parquet_file = pq.ParquetFile(source)
+    yield tuple(parquet_file.schema_arrow.names)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
+class TabularWorkbook(ValuesWorkbook):
+    """A workbook whose only sheet is returned for every sheet name"""
+
+    def __getitem__(self, sheet_name):
+        return self.active
+
+
+def open_tabular(source, input_type, encoding=None):
+    """
+    A CSV or Parquet path, bytes or binary file-like object as a TabularWorkbook.
+    encoding is the text encoding of a CSV file (default: CSV_ENCODING).
+
+    Every source sheet of a mapping walks the file again. A file-like object
+    is walked from its current position each time and is not closed; one
+    that can't seek is read into memory first.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    title = os.path.basename(str(getattr(source, "name", source)))
+    if not isinstance(source, (str, os.PathLike)) and not source.seekable():
+        source = io.BytesIO(source.read())
+    if input_type == "csv":
+        start = 0 if isinstance(source, (str, os.PathLike)) else source.tell()
+        return TabularWorkbook(
+            [ValuesSheet(title, lambda: csv_rows(source, encoding=encoding, start=start))]
+        )
+    if input_type == "parquet":
+        return TabularWorkbook([ValuesSheet(title, lambda: parquet_rows(source))])
+    raise ValueError(f"Unsupported tabular input type: {input_type}")
@@ -0,0 +1,102 @@
+"""
+In-memory cache of parsed template workbooks.
+
+Each template file is parsed once and kept as a pristine pickled snapshot.
+Every caller gets its own clone unpickled from that snapshot, which is much
+cheaper than parsing the xlsx again, and is free to modify it. An entry is
+reparsed when the file's mtime or size changes. Workbooks that can't be
+pickled (e.g. with embedded images) fall back to parsing the cached file
+bytes, which still saves the disk read.
+"""
+import copyreg
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from io import BytesIO
+
+from openpyxl import load_workbook
+from openpyxl.worksheet.table import TableList
+
+# Number of templates kept in memory
+MAX_TEMPLATES = 8
+
+
+def reduce_table_list(tables):
+    # TableList.items() returns (name, ref) pairs, so pickle's default dict
+    # handling would turn the tables into their ref strings
+    return TableList, (), None, None, iter(dict.items(tables))
+
+
+class SnapshotPickler(pickle.Pickler):
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[TableList] = reduce_table_list
+
+
+def snapshot(workbook):
+    """Pickle a workbook into a snapshot that template clones are loaded from"""
+    buffer = BytesIO()
+    SnapshotPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(workbook)
+    return buffer.getvalue()
+
+
+class TemplateCache:
+    def __init__(self, max_templates=MAX_TEMPLATES):
+        self.max_templates = max_templates
+        # path or content hash -> ((mtime_ns, size) or None, file bytes, pickled workbook or None)
+        self.entries = OrderedDict()
+
+    def load(self, template_path):
+        """A fresh, modifiable copy of the template workbook"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != (stat.st_mtime_ns, stat.st_size):
+            with open(path, "rb") as file:
+                entry = self.parse(path, file.read(), (stat.st_mtime_ns, stat.st_size))
+        return self.clone(path, entry)
+
+    def load_content(self, content):
+        """A fresh, modifiable copy of a template given as xlsx bytes, cached by content hash"""
+        key = hashlib.sha256(content).hexdigest()
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.parse("<bytes>", content, None)
+        return self.clone(key, entry)
+
+    def clone(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_templates:
+            self.entries.popitem(last=False)
+
+        workbook_snapshot = entry[2]
+        if workbook_snapshot is not None:
+            return pickle.loads(workbook_snapshot)
+        return load_workbook(BytesIO(entry[1]))
+
+    def parse(self, name, content, version):
+        workbook = load_workbook(BytesIO(content))
+        try:
+            workbook_snapshot = snapshot(workbook)
+        except Exception as e:
+            print(f"Warning: Template {name} can't be snapshotted, it will be reparsed: {str(e)}")
+            workbook_snapshot = None
+        return (version, content, workbook_snapshot)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Shared cache used by the pipeline scripts
+template_cache = TemplateCache()
+
+
+def load_template(template_path):
+    """Load a template workbook through the shared cache"""
+    return template_cache.load(template_path)
+
+
+def load_template_content(content):
+    """Load a template workbook given as bytes through the shared cache"""
+    return template_cache.load_content(content)
@@ -0,0 +1,104 @@
+"""
+The batch pipeline must write the same output as the column pipeline.
+
+Run from the repository root:
+    python -m pytest test
+"""
+import copy
+import os
+import sys
+
+import pytest
+from openpyxl import load_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import transformation2  # noqa: E402
+
+ROWS = [
+    ("Phone", "First Name", "Last Name"),
+    ("555-0100", "ada", "lovelace"),
+    ("555-0101", "alan", "turing"),
+    (None, "grace", "hopper"),
+    ("555-0103", "edsger", "dijkstra"),
+    ("555-0104", "barbara", "liskov"),
+]
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    # The module configuration (mappings, template) uses paths relative to the root
+    monkeypatch.chdir(ROOT)
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as file:
+        for row in rows:
+            file.write(",".join("" if value is None else value for value in row) + "\n")
+    return {"path": str(path), "type": "csv"}
+
+
+def schema_with(mappings):
+    schema = copy.deepcopy(transformation2.get_mapping_schema())
+    schema["mappings"] = mappings
+    return schema
+
+
+def sheet_values(path):
+    workbook = load_workbook(path)
+    return {
+        # Array formulas are objects; compare their formula text
+        sheet.title: [
+            tuple(getattr(value, "text", value) for value in row)
+            for row in sheet.iter_rows(values_only=True)
+        ]
+        for sheet in workbook.worksheets
+    }
+
+
+def run_both(tmp_path, input_files, schema, batch_rows=2):
+    """Values of the column pipeline and the batch pipeline outputs"""
+    template = transformation2.TEMPLATE_FILE["path"]
+    column_output = tmp_path / "column.xlsx"
+    batch_output = tmp_path / "batch.xlsx"
+    transformation2.run_job(input_files, schema, template, str(column_output))
+    transformation2.run_job(input_files, schema, template, str(batch_output), batch_rows=batch_rows)
+    return sheet_values(column_output), sheet_values(batch_output)
+
+
+def test_header_named_column_on_row_1(tmp_path):
+    input_files = [
+        write_csv(tmp_path / "a.csv", ROWS),
+        write_csv(tmp_path / "b.csv", ROWS[:3]),
+    ]
+    schema = schema_with(
+        [
+            {
+                "field_name": "Last Name",
+                "source": {"sheet": "Sheet1", "range": "A2:A_", "column": "Last Name"},
+                "transformations": ["capitalize"],
+                "destination": [{"sheet": "Sheet1", "range": "B25:B_"}],
+            }
+        ]
+    )
+    column_values, batch_values = run_both(tmp_path, input_files, schema)
+    assert batch_values == column_values
+    assert column_values["Sheet1"][24][1] == "Lovelace"
+
+
+def test_dynamic_range_starting_on_row_1(tmp_path):
+    input_files = [write_csv(tmp_path / "a.csv", ROWS[1:])]
+    schema = schema_with(
+        [
+            {
+                "field_name": "First Name",
+                "source": {"sheet": "Sheet1", "range": "B1:B_"},
+                "transformations": ["uppercase"],
+                "destination": [{"sheet": "Sheet1", "range": "C25:C_"}],
+            }
+        ]
+    )
+    column_values, batch_values = run_both(tmp_path, input_files, schema)
+    assert batch_values == column_values
+    assert column_values["Sheet1"][24][2] == "ADA"
@@ -0,0 +1,85 @@
+"""
+A job whose data stores come from the DataStoreCache must write the same
+output as a job that reads its inputs.
+
+Run from the repository root:
+    python -m pytest test
+"""
+import os
+import sys
+
+import pytest
+from openpyxl import load_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data_store_cache  # noqa: E402
+import transformation2  # noqa: E402
+from columns import to_list  # noqa: E402
+from data_store_cache import DataStoreCache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    # The module configuration (mappings, template) uses paths relative to the root
+    monkeypatch.chdir(ROOT)
+
+
+def sheet_values(path):
+    workbook = load_workbook(path)
+    return {
+        # Array formulas are objects; compare their formula text
+        sheet.title: [
+            tuple(getattr(value, "text", value) for value in row)
+            for row in sheet.iter_rows(values_only=True)
+        ]
+        for sheet in workbook.worksheets
+    }
+
+
+def plain_values(data_store):
+    return {field_name: to_list(data) for field_name, data in data_store.items()}
+
+
+def run(output):
+    transformation2.run_job(
+        transformation2.INPUT_FILES,
+        transformation2.get_mapping_schema(),
+        transformation2.TEMPLATE_FILE["path"],
+        str(output),
+    )
+    return sheet_values(output)
+
+
+def test_cached_run_matches_uncached_run(monkeypatch, tmp_path, capsys):
+    uncached = run(tmp_path / "uncached.xlsx")
+
+    monkeypatch.setattr(transformation2, "DATA_STORE_CACHE_DIR", str(tmp_path / "cache"))
+    cold = run(tmp_path / "cold.xlsx")
+    capsys.readouterr()
+    warm = run(tmp_path / "warm.xlsx")
+
+    assert "Using cached data" in capsys.readouterr().out
+    assert cold == uncached
+    assert warm == uncached
+
+
+def test_cached_data_stores_match_read_data_stores(tmp_path):
+    schema = transformation2.get_mapping_schema()
+    cache = DataStoreCache(str(tmp_path))
+    read = transformation2.read_input_files(transformation2.INPUT_FILES, schema)
+    transformation2.read_input_files(transformation2.INPUT_FILES, schema, cache=cache)
+    cached = transformation2.read_input_files(transformation2.INPUT_FILES, schema, cache=cache)
+
+    assert len(cache.entries()) == len(transformation2.INPUT_FILES)
+    for read_store, cached_store in zip(read, cached):
+        assert plain_values(cached_store) == plain_values(read_store)
+
+
+def test_cache_version_is_part_of_the_key(monkeypatch, tmp_path):
+    cache = DataStoreCache(str(tmp_path))
+    input_path = transformation2.INPUT_FILES[0]["path"]
+    key = cache.key(input_path, "plan")
+    monkeypatch.setattr(data_store_cache, "CACHE_VERSION", data_store_cache.CACHE_VERSION + 1)
+    assert cache.key(input_path, "plan") != key
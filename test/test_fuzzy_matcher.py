@@ -0,0 +1,57 @@
+"""
+FuzzyMatcher must resolve values like the difflib lookup data_mapper used
+before, apart from the deliberate case/whitespace-normalized step.
+
+Run from the repository root:
+    python -m pytest test
+"""
+import os
+import random
+import string
+import sys
+from difflib import get_close_matches
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fuzzy_matcher import FuzzyMatcher, normalize  # noqa: E402
+
+
+def random_word(rng):
+    return "".join(rng.choices(string.ascii_lowercase[:8] + " ", k=rng.randint(1, 10)))
+
+
+def difflib_resolve(mappings, text):
+    """The baseline data_mapper lookup: exact key, then get_close_matches"""
+    if text in mappings:
+        return mappings[text]
+    matches = get_close_matches(text, mappings.keys(), n=1, cutoff=0.75)
+    return mappings[matches[0]] if matches else text
+
+
+def test_matches_difflib_outside_the_normalized_step():
+    rng = random.Random(0)
+    mappings = {random_word(rng): f"value {i}" for i in range(300)}
+    normalized_keys = {normalize(key) for key in mappings}
+    matcher = FuzzyMatcher(mappings, cutoff=0.75)
+
+    checked = 0
+    for _ in range(2000):
+        text = random_word(rng)
+        if text not in mappings and normalize(text) in normalized_keys:
+            # Resolved by the normalized lookup, a deliberate change
+            continue
+        assert matcher.resolve(text) == difflib_resolve(mappings, text), text
+        checked += 1
+    assert checked > 1000
+
+
+def test_normalized_lookup_ignores_case_and_whitespace():
+    matcher = FuzzyMatcher({"New York": "NY", "Newark": "NJ"})
+    assert matcher.resolve("  new   YORK ") == "NY"
+
+
+def test_none_values_are_returned_not_fuzzy_matched():
+    matcher = FuzzyMatcher({"N/A": None, "n/b": "fallback"})
+    assert matcher.resolve("N/A") is None
+    assert matcher.resolve("n/a") is None
@@ -0,0 +1,131 @@
+"""
+The streaming merge engine must write the same merged workbook as copying
+the first input and appending the other inputs' rows cell by cell.
+
+Run from the repository root:
+    python -m pytest test
+"""
+import os
+import sys
+from copy import copy
+
+import pytest
+from openpyxl import load_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import merge_files  # noqa: E402
+
+STYLE_PARTS = ("font", "border", "fill", "number_format", "protection", "alignment")
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    # The merge configuration is read from a path relative to the root
+    monkeypatch.chdir(ROOT)
+
+
+def input_paths():
+    return [input_file["path"] for input_file in merge_files.INPUT_FILES]
+
+
+def reference_merge(paths):
+    """The cell-by-cell merge merge_files used before the streaming engine"""
+    merge_config = merge_files.get_merge_config()
+    data_start_row = merge_config.get("data_start_row", 2)
+    merged_wb = load_workbook(paths[0])
+    merged_sheet = merged_wb.active
+    current_row = merged_sheet.max_row + 1
+    max_cols = merged_sheet.max_column
+    for path in paths[1:]:
+        sheet = merge_files.get_sheet(
+            load_workbook(path, data_only=True), merge_config.get("sheet", "active")
+        )
+        for row_idx in range(data_start_row, sheet.max_row + 1):
+            if all(cell.value is None for cell in sheet[row_idx]):
+                continue
+            for col_idx in range(1, max_cols + 1):
+                cell = sheet.cell(row=row_idx, column=col_idx)
+                new_cell = merged_sheet.cell(row=current_row, column=col_idx, value=cell.value)
+                if cell.has_style:
+                    for part in STYLE_PARTS:
+                        setattr(new_cell, part, copy(getattr(cell, part)))
+            current_row += 1
+    return merged_wb
+
+
+def reference_headers_match(paths):
+    """The full-load header comparison merge_files used before the pre-flight"""
+    merge_config = merge_files.get_merge_config()
+    header_row = merge_config.get("header_row", 1)
+    headers = [
+        [
+            cell.value
+            for cell in merge_files.get_sheet(
+                load_workbook(path, data_only=True), merge_config.get("sheet", "active")
+            )[header_row]
+        ]
+        for path in paths
+    ]
+    return all(current == headers[0] for current in headers[1:])
+
+
+def with_header(tmp_path, source_path, name, column, value):
+    """A copy of an input with one header cell changed"""
+    workbook = load_workbook(source_path)
+    header_row = merge_files.get_merge_config().get("header_row", 1)
+    merge_files.get_sheet(workbook, "active").cell(row=header_row, column=column, value=value)
+    path = str(tmp_path / name)
+    workbook.save(path)
+    return path
+
+
+def workbook_contents(workbook):
+    """Value and style of every cell, and the merged ranges, per sheet"""
+    return {
+        sheet.title: (
+            {
+                cell.coordinate: (cell.value,) + tuple(repr(getattr(cell, part)) for part in STYLE_PARTS)
+                for row in sheet.iter_rows()
+                for cell in row
+                if cell.value is not None or cell.has_style
+            },
+            sorted(str(cell_range) for cell_range in sheet.merged_cells.ranges),
+        )
+        for sheet in workbook.worksheets
+    }
+
+
+def test_merge_matches_cell_by_cell_merge(tmp_path):
+    paths = input_paths()
+    output_path = str(tmp_path / "merged.xlsx")
+    assert merge_files.merge_input_files(paths, output_path) == output_path
+
+    reference_path = tmp_path / "reference.xlsx"
+    reference_merge(paths).save(reference_path)
+    assert workbook_contents(load_workbook(output_path)) == workbook_contents(
+        load_workbook(reference_path)
+    )
+
+
+def test_header_preflight_matches_full_load_comparison(tmp_path):
+    paths = input_paths()
+    renamed = with_header(tmp_path, paths[1], "renamed.xlsx", 1, "Renamed")
+    cases = [paths, paths[:1] + [renamed], [renamed, paths[0], paths[1]]]
+    for case in cases:
+        assert merge_files.validate_input_headers(case) == reference_headers_match(case)
+    assert merge_files.validate_input_headers(paths)
+    assert not merge_files.validate_input_headers(cases[1])
+
+
+def test_process_input_files_matches_cell_by_cell_merge(tmp_path):
+    paths = input_paths()
+    output_path = merge_files.process_input_files(paths, str(tmp_path))
+    assert output_path is not None
+
+    reference_path = tmp_path / "reference.xlsx"
+    reference_merge(paths).save(reference_path)
+    assert workbook_contents(load_workbook(output_path)) == workbook_contents(
+        load_workbook(reference_path)
+    )
@@ -0,0 +1,111 @@
+"""
+The streaming writer (STREAMING_WRITE) must write the same output as the
+in-memory writer, and fail the same way on merged target cells.
+
+Run from the repository root:
+    python -m pytest test
+"""
+import os
+import sys
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import transformation2  # noqa: E402
+
+MAPPING = {
+    "default_formats": {"data_cells": {"font": {"bold": True}}},
+    "mappings": [
+        {
+            "field_name": "Name",
+            "source": {"sheet": "Sheet1", "range": "A2:A_"},
+            "transformations": ["uppercase"],
+            "destination": [{"sheet": "Roster", "range": "B3:B_"}],
+        }
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    # The module configuration (mappings, template) uses paths relative to the root
+    monkeypatch.chdir(ROOT)
+
+
+def write_csv(path, names):
+    path.write_text("Name\n" + "".join(f"{name}\n" for name in names))
+    return {"path": str(path), "type": "csv"}
+
+
+def write_template(path, merge=None):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Roster"
+    sheet["A1"] = "Crew roster"
+    sheet["B2"] = "Name"
+    if merge:
+        sheet.merge_cells(merge)
+    workbook.save(path)
+    return str(path)
+
+
+def cell_contents(path):
+    """Value and style of every cell, and the merged ranges, per sheet"""
+    workbook = load_workbook(path)
+    return {
+        sheet.title: (
+            {
+                cell.coordinate: (
+                    # Array formulas are objects; compare their formula text
+                    getattr(cell.value, "text", cell.value),
+                    repr(cell.font),
+                    repr(cell.fill),
+                    repr(cell.border),
+                    repr(cell.alignment),
+                    cell.number_format,
+                )
+                for row in sheet.iter_rows()
+                for cell in row
+            },
+            sorted(str(cell_range) for cell_range in sheet.merged_cells.ranges),
+        )
+        for sheet in workbook.worksheets
+    }
+
+
+def run_writer(monkeypatch, streaming, input_files, schema, template, output):
+    monkeypatch.setattr(transformation2, "STREAMING_WRITE", streaming)
+    transformation2.run_job(input_files, schema, template, str(output))
+    return cell_contents(output)
+
+
+def test_sample_roster_matches_in_memory_writer(monkeypatch, tmp_path):
+    schema = transformation2.get_mapping_schema()
+    template = transformation2.TEMPLATE_FILE["path"]
+    input_files = transformation2.INPUT_FILES
+    in_memory = run_writer(monkeypatch, False, input_files, schema, template, tmp_path / "memory.xlsx")
+    streamed = run_writer(monkeypatch, True, input_files, schema, template, tmp_path / "stream.xlsx")
+    assert streamed == in_memory
+
+
+def test_merge_outside_the_written_cells(monkeypatch, tmp_path):
+    input_files = [write_csv(tmp_path / "a.csv", ["ada", "alan", "grace"])]
+    template = write_template(tmp_path / "template.xlsx", merge="A1:C1")
+    in_memory = run_writer(monkeypatch, False, input_files, MAPPING, template, tmp_path / "memory.xlsx")
+    streamed = run_writer(monkeypatch, True, input_files, MAPPING, template, tmp_path / "stream.xlsx")
+    assert streamed == in_memory
+    assert in_memory["Roster"][0]["B5"][0] == "GRACE"
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_merged_target_cells_are_rejected(monkeypatch, tmp_path, streaming):
+    input_files = [write_csv(tmp_path / "a.csv", ["ada", "alan", "grace"])]
+    # B4 and B5 are covered by the merge, so only B3 can be written
+    template = write_template(tmp_path / "template.xlsx", merge="B3:B5")
+    output = tmp_path / "output.xlsx"
+    with pytest.raises(AttributeError, match="MergedCell"):
+        run_writer(monkeypatch, streaming, input_files, MAPPING, template, output)
+    assert not output.exists()
@@ -0,0 +1,91 @@
+"""
+CSV inputs given as bytes or streams must read like CSV files, also when
+the mapping walks the file once per source sheet.
+
+Run from the repository root:
+    python -m pytest test
+"""
+import io
+import os
+import sys
+
+import pytest
+from openpyxl import load_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import transformation2  # noqa: E402
+from columns import to_list  # noqa: E402
+
+CSV = b"Name,Phone\nada,555-0100\nalan,555-0101\n"
+
+# Two source sheets, so the CSV file is walked twice
+MAPPING = {
+    "mappings": [
+        {
+            "field_name": "Name",
+            "source": {"sheet": "Sheet1", "range": "A2:A_"},
+            "destination": [{"sheet": "Roster", "range": "A2:A_"}],
+        },
+        {
+            "field_name": "Phone",
+            "source": {"sheet": "Contacts", "range": "B2:B_"},
+            "destination": [{"sheet": "Roster", "range": "B2:B_"}],
+        },
+    ]
+}
+
+
+class UnseekableStream(io.RawIOBase):
+    """A binary stream that can only be read forward, like a pipe"""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.data.readinto(buffer)
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    # The module configuration (mappings, template) uses paths relative to the root
+    monkeypatch.chdir(ROOT)
+
+
+def read(source):
+    data_store = transformation2.read_and_validate_data(source, MAPPING, input_type="csv")
+    return {field_name: to_list(data) for field_name, data in data_store.items()}
+
+
+def test_streams_read_like_files(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_bytes(CSV)
+    expected = {"Name": ["ada", "alan"], "Phone": ["555-0100", "555-0101"]}
+    assert read(str(path)) == expected
+    assert read(CSV) == expected
+    assert read(UnseekableStream(CSV)) == expected
+
+    stream = io.BytesIO(CSV)
+    assert read(stream) == expected
+    # The caller's stream is left open, and can be read again
+    assert not stream.closed
+    stream.seek(0)
+    assert read(stream) == expected
+
+    # Streams are read from their position when they're opened
+    stream = io.BytesIO(b"preamble" + CSV)
+    stream.seek(len(b"preamble"))
+    assert read(stream) == expected
+
+
+def test_convert_roster_reads_csv_bytes():
+    output = transformation2.convert_roster([CSV], mapping=MAPPING, template=None, input_types=["csv"])
+    sheet = load_workbook(io.BytesIO(output))["Roster"]
+    assert [row for row in sheet.iter_rows(min_row=2, values_only=True)] == [
+        ("ada", "555-0100"),
+        ("alan", "555-0101"),
+    ]
@@ -0,0 +1,107 @@
+"""
+Reading an input reports every violation at once, the same way in the
+column pipeline, the worker pool and the batch pipeline.
+
+Run from the repository root:
+    python -m pytest test
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import transformation2  # noqa: E402
+from validation_report import ValidationError  # noqa: E402
+
+ROWS = [
+    ("Name", "Phone"),
+    ("ada", "555-0100"),
+    ("", "555-0101"),
+    ("grace", ""),
+    ("", ""),
+    ("barbara", "555-0104"),
+]
+
+MAPPING = {
+    "mappings": [
+        {
+            "field_name": "Name",
+            "source": {"sheet": "Sheet1", "range": "A2:A_"},
+            "validation": [{"type": "required", "message": "Name is required."}],
+            "destination": [{"sheet": "Roster", "range": "A2:A_"}],
+        },
+        {
+            "field_name": "Phone",
+            "source": {"sheet": "Sheet1", "range": "B2:B_"},
+            "validation": [{"type": "required", "message": "Phone is required."}],
+            "destination": [{"sheet": "Roster", "range": "B2:B_"}],
+        },
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    # The module configuration (mappings, template) uses paths relative to the root
+    monkeypatch.chdir(ROOT)
+
+
+def write_csv(path, rows):
+    path.write_text("".join(",".join(row) + "\n" for row in rows))
+    return {"path": str(path), "type": "csv"}
+
+
+def violations(error):
+    """The violations of a ValidationError, with their rows as lists"""
+    return sorted(
+        (os.path.basename(str(source)), field_name, message, sheet, column, sorted(rows))
+        for source, field_name, message, sheet, column, rows in error.violations
+    )
+
+
+def job_violations(tmp_path, input_files, **options):
+    output = tmp_path / "output.xlsx"
+    with pytest.raises(ValidationError) as error:
+        transformation2.run_job(input_files, MAPPING, None, str(output), **options)
+    assert not output.exists()
+    return violations(error.value)
+
+
+def test_every_violation_is_reported(tmp_path):
+    input_file = write_csv(tmp_path / "a.csv", ROWS)
+    with pytest.raises(ValidationError) as error:
+        transformation2.read_and_validate_data(input_file["path"], MAPPING, input_type="csv")
+
+    # Still a ValueError, as the first violation used to be
+    assert isinstance(error.value, ValueError)
+    assert violations(error.value) == [
+        ("a.csv", "Name", "Name is required but found empty value", "Sheet1", 1, [3, 5]),
+        ("a.csv", "Phone", "Phone is required but found empty value", "Sheet1", 2, [4, 5]),
+    ]
+    assert str(error.value).splitlines()[0] == "4 validation errors:"
+
+
+def test_modes_report_the_same_violations(tmp_path, monkeypatch):
+    input_files = [write_csv(tmp_path / "a.csv", ROWS), write_csv(tmp_path / "b.csv", ROWS[:4])]
+    column = job_violations(tmp_path, input_files)
+    batch = job_violations(tmp_path, input_files, batch_rows=2)
+    monkeypatch.setattr(transformation2, "PARALLEL_WORKERS", 2)
+    pool = job_violations(tmp_path, input_files)
+
+    assert column == batch == pool
+    assert [(source, rows) for source, field_name, message, sheet, column, rows in column] == [
+        ("a.csv", [3, 5]),
+        ("a.csv", [4, 5]),
+        ("b.csv", [3]),
+        ("b.csv", [4]),
+    ]
+
+
+def test_valid_input_reads_without_violations(tmp_path):
+    input_file = write_csv(tmp_path / "a.csv", ROWS[:2])
+    data_store = transformation2.read_and_validate_data(input_file["path"], MAPPING, input_type="csv")
+    assert list(data_store["Name"]) == ["ada"]
+    assert list(data_store["Phone"]) == ["555-0100"]
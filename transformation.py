@@ -1,5 +1,6 @@
 import json
-from openpyxl import load_workbook, Workbook
+from openpyxl import Workbook
+from workbook_readers import open_values_workbook
 from pprint import pprint
 
 # Define file paths
@@ -7,16 +8,19 @@ input_file_path = "./test/testInputFiles/input.xlsm"
 output_file_path = "./test/testOutputFiles/output.xlsm"
 mapping_file_path = "mapping.json"
 
-def read_and_display_data(input_path):
-    # Load the workbook and select the active sheet
-    workbook = load_workbook(input_path, data_only=True)
-    sheet = workbook.active
-    
-    # Iterate through the rows and print the values
-    data = []
-    for row in sheet.iter_rows(values_only=True):
-        data.append(row)
-        # print(row)
+def read_and_display_data(input_path, reader="openpyxl"):
+    # Load the workbook with a reader backend of workbook_readers and select the active sheet
+    workbook = open_values_workbook(input_path, reader)
+    try:
+        sheet = workbook.active
+
+        # Iterate through the rows and print the values
+        data = []
+        for row in sheet.iter_rows(values_only=True):
+            data.append(row)
+            # print(row)
+    finally:
+        workbook.close()
     
     return data
 
@@ -84,8 +88,9 @@ def write_output_data(table_data, output_schema, output_path):
     # Save the workbook to the output path
     workbook.save(output_path)
 
-# Call the function to read and display data
-data = read_and_display_data(input_file_path)
+if __name__ == "__main__":
+    # Call the function to read and display data
+    data = read_and_display_data(input_file_path)
 
-# Call the function to process and write data
-process_and_write_data(data, mapping_file_path, output_file_path)
\ No newline at end of file
+    # Call the function to process and write data
+    process_and_write_data(data, mapping_file_path, output_file_path)
\ No newline at end of file
@@ -1,13 +1,34 @@
+"""
+Roster conversion pipeline: read the mapped fields of the input workbooks,
+merge and transform them, and write them into the output template.
+
+Importing this module is cheap: the mapping files are loaded on first use
+(get_mapping_schema, get_data_mappings) and openpyxl and the workbook
+helpers are imported by the functions that read or write workbooks.
+"""
 import json
-from openpyxl import Workbook, load_workbook
-from openpyxl.utils import get_column_letter, column_index_from_string
-from openpyxl.styles import Font, Fill, Border, Side, Alignment, PatternFill
-from pprint import pprint
-import sys
-from difflib import get_close_matches
 import os
-import shutil
+from functools import partial
+from weakref import WeakKeyDictionary
 from pathlib import Path
+from io import BytesIO
+from itertools import chain
+from column_engine import vectorize
+from columns import ConstantColumn, SplitColumn, concat_columns, is_column, make_column, to_list
+from data_store_cache import DataStoreCache
+from fuzzy_matcher import FuzzyMatcher
+from instrumentation import count_rows, measure, profile_job
+from tabular_sources import TABULAR_TYPES, input_type_from_path, open_tabular
+from validation_report import ValidationError, ValidationReport
+from workbook_readers import open_values_workbook
+from mapping_plan import (
+    compile_mapping_plan,
+    is_dynamic,
+    is_single_cell,
+    parse_column_span,
+    parse_range,
+    parse_transformation,
+)
 
 # Configuration that will later come from database
 INPUT_FILES = [
@@ -16,17 +37,69 @@ INPUT_FILES = [
 ]
 TEMPLATE_FILE = {"path": "./ref/output_template.xlsx", "type": "excel"}
 OUTPUT_PATH = "./roaster/output/"
+# Read inputs with a single read-only pass per source sheet
+STREAMING_READ = True
+# Reader backend for input workbooks: "openpyxl", "openpyxl-readonly" or
+# "calamine" (see workbook_readers). None uses openpyxl-readonly when
+# STREAMING_READ is set, else openpyxl. An INPUT_FILES entry can pick its own
+# backend with a "reader" key.
+READER_BACKEND = None
+# Write the output row by row into a write-only workbook
+STREAMING_WRITE = True
+# Number of processes used to read input files in parallel (None or 1 reads them sequentially)
+PARALLEL_WORKERS = None
+# Directory for a JSON profiling report per job (None disables profiling)
+PROFILE_DIR = None
+# Also record cProfile stats / tracemalloc allocations in the report (slow)
+PROFILE_CPROFILE = False
+PROFILE_TRACEMALLOC = False
+# Directory for cached per-file data stores, reused while an input file and the
+# mapping are unchanged (None disables the cache). Entries are unpickled, so
+# only point this at a directory trusted users can write to.
+DATA_STORE_CACHE_DIR = None
+DATA_STORE_CACHE_MAX_BYTES = 256 * 2**20
+# Compile conditional_format blocks into native worksheet conditional
+# formatting rules that Excel evaluates, instead of checking the condition
+# for every written row (blocks that can't be expressed natively still are)
+NATIVE_CONDITIONAL_FORMATS = False
+# Run jobs through the batch pipeline (batch_pipeline) with batches of this
+# many rows, so memory doesn't grow with the roster (None reads whole columns)
+BATCH_ROWS = None
+
+# Marks the end of a stream of values in stream_sheet
+STREAM_END = object()
 
 # File paths for mappings
 mapping_file_path = "./mappings/roaster-mapping.json"
 data_mapping_file_path = "./mappings/data-mappings.json"
 
-# Load the mapping schemas globally
-with open(mapping_file_path, "r") as file:
-    mapping_schema = json.load(file)
-
-with open(data_mapping_file_path, "r") as file:
-    data_mappings = json.load(file)
+def get_mapping_schema():
+    """The mapping schema from mapping_file_path, loaded on first use"""
+    global mapping_schema
+    if "mapping_schema" not in globals():
+        with open(mapping_file_path, "r") as file:
+            mapping_schema = json.load(file)
+    return mapping_schema
+
+def get_data_mappings():
+    """The value mappings from data_mapping_file_path, loaded on first use"""
+    global data_mappings
+    if "data_mappings" not in globals():
+        with open(data_mapping_file_path, "r") as file:
+            data_mappings = json.load(file)
+    return data_mappings
+
+def __getattr__(name):
+    # transformation2.mapping_schema / data_mappings load the file on first access
+    if name == "mapping_schema":
+        return get_mapping_schema()
+    if name == "data_mappings":
+        return get_data_mappings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_mapping_plan(mapping_schema):
+    """Return the compiled (and cached) plan for a mapping schema"""
+    return compile_mapping_plan(mapping_schema, transformation_functions)
 
 # Define transformation functions
 def split_name(name, separator=" "):
@@ -106,6 +179,21 @@ def title_case(text):
 
     return " ".join(result)
 
+# Prebuilt fuzzy matchers, keyed by value_mappings key
+value_matchers = {}
+
+def get_value_matcher(mapping_key):
+    """Return the prebuilt FuzzyMatcher for a value_mappings key, or None"""
+    value_mappings = get_data_mappings().get("value_mappings", {}).get(mapping_key, {})
+    if not value_mappings:
+        return None
+    cached = value_matchers.get(mapping_key)
+    # Rebuild if data_mappings was reloaded since the matcher was built
+    if cached is None or cached[0] is not value_mappings:
+        cached = (value_mappings, FuzzyMatcher(value_mappings, cutoff=0.75))
+        value_matchers[mapping_key] = cached
+    return cached[1]
+
 def data_mapper(text, mapping_key):
     """Replace text with its alternate term from value_mappings using fuzzy matching"""
     if not text:
@@ -117,79 +205,85 @@ def data_mapper(text, mapping_key):
     # Convert input to string for comparison
     text = str(text)
 
-    # Get the mapping dictionary for the specified key from data_mappings
-    value_mappings = data_mappings.get("value_mappings", {}).get(mapping_key, {})
-
-    if not value_mappings:
+    # Get the prebuilt matcher for the specified key from data_mappings
+    matcher = get_value_matcher(mapping_key)
+    if matcher is None:
         return text
 
-    # Convert all mapping keys to strings for comparison
-    string_mappings = {str(k): v for k, v in value_mappings.items()}
+    # Exact, then normalized, then fuzzy match. Returns the original text
+    # if nothing matches
+    return matcher.resolve(text)
 
-    # Try exact match first
-    if text in string_mappings:
-        return string_mappings[text]
-
-    # If no exact match, try fuzzy matching
-    try:
-        matches = get_close_matches(text, string_mappings.keys(), n=1, cutoff=0.75)
-        # If we found a fuzzy match, use its mapping
-        if matches:
-            return string_mappings[matches[0]]
-    except TypeError as e:
-        print(f"Warning: Fuzzy matching failed for '{text}' - {str(e)}")
-    # If no match found or error occurred, return original text
-    return text
 
+class CounterOperator:
+    """
+    The counter of generate_data_based_on as a streaming operator: call it with
+    consecutive batches of a column and the count carries over from one batch
+    to the next, so the result is the same as for the whole column at once.
+    """
 
-def generate_data_based_on(source_data, field_name):
+    def __init__(self, field_name, schema=None):
+        if schema is None:
+            schema = get_mapping_schema()
+        rules = schema.get("transformation_rules", {}).get(field_name, {})
+        self.field_name = field_name
+        # None if the field has no counter rules, then values pass through
+        self.counter_rules = rules.get("counter_rules") if rules else None
+        if self.counter_rules is None:
+            return
+
+        # Get counter configuration
+        self.count = self.counter_rules.get("start", 1)
+        increment_triggers = self.counter_rules.get("increment_on", [])
+        self.case_sensitive = self.counter_rules.get("case_sensitive", False)
+        self.output_type = self.counter_rules.get("output_type", "string")
+        self.check_triggers = (
+            increment_triggers
+            if self.case_sensitive
+            else [trigger.lower() for trigger in increment_triggers]
+        )
+        self.previous_value = None
+
+    def __call__(self, source_data):
+        if self.counter_rules is None:
+            return source_data
+
+        result = []
+        count = self.count
+        previous_value = self.previous_value
+        check_triggers = self.check_triggers
+        for value in source_data:
+            check_value = str(value) if self.case_sensitive else str(value).lower()
+
+            if check_value in check_triggers:
+                trigger_index = check_triggers.index(check_value)
+                if trigger_index == 0:
+                    count += 1
+                elif trigger_index == 1 and previous_value != check_triggers[0]:
+                    count += 1
+
+            result.append(str(count) if self.output_type == "string" else count)
+            previous_value = check_value
+        self.count = count
+        self.previous_value = previous_value
+        return result
+
+def generate_data_based_on(source_data, field_name, schema=None):
     """
     Generate crew numbers based on classification data.
     source_data: Array of classification values
     field_name: The field whose transformation rules to use
+    schema: Mapping schema holding the rules (default: the loaded mapping_schema)
     """
     if not source_data or not isinstance(source_data, list):
         print(f"DEBUG: Empty or invalid source data for {field_name}")
         return []
 
-    rules = mapping_schema.get("transformation_rules", {}).get(field_name, {})
-    if not rules or "counter_rules" not in rules:
+    counter = CounterOperator(field_name, schema)
+    if counter.counter_rules is None:
         print(f"DEBUG: No counter rules found for {field_name}")
         return source_data
-
-    # Get counter configuration
-    counter_rules = rules["counter_rules"]
-    count = counter_rules.get("start", 1)
-    increment_triggers = counter_rules.get("increment_on", [])
-    case_sensitive = counter_rules.get("case_sensitive", False)
-    output_type = counter_rules.get("output_type", "string")
-    # print(f"\nProcessing Crew Numbers:")
-    # print(f"Initial count: {count}")
-    # print(f"Increment triggers: {increment_triggers}")
-
-    result = []
-    previous_value = None
-    for value in source_data:
-        check_value = str(value) if case_sensitive else str(value).lower()
-        check_triggers = (
-            increment_triggers
-            if case_sensitive
-            else [trigger.lower() for trigger in increment_triggers]
-        )
-
-        if check_value in check_triggers:
-            trigger_index = check_triggers.index(check_value)
-            if trigger_index == 0:
-                count += 1
-                # print(f"Incrementing count to {count} for value: {value}")
-            elif trigger_index == 1 and previous_value != check_triggers[0]:
-                count += 1
-                # print(f"Incrementing count to {count} for value: {value}")
-
-        result.append(str(count) if output_type == "string" else count)
-        previous_value = check_value
-        # print(f"Value: {value} -> Crew Number: {count}")
-    return result
+    return counter(source_data)
 
 # Map transformation names to functions
 transformation_functions = {
@@ -202,200 +296,415 @@ transformation_functions = {
     "generate_data_based_on": generate_data_based_on,
 }
 
-def apply_transformations(data, transformations):
+# Column-at-a-time versions of the element-wise transformations. Whole-column
+# data runs through these; anything not listed here (custom transforms,
+# data_mapper, generate_data_based_on) uses the per-value function above.
+column_transformations = {
+    "split_name": vectorize(split_name, strings_only=True),
+    "capitalize": vectorize(capitalize, strings_only=True),
+    "convert_to_integer": vectorize(convert_to_integer),
+    "uppercase": vectorize(uppercase, strings_only=True),
+    "title_case": vectorize(title_case),
+}
+
+# Transformations that read their rules from the mapping schema being processed
+schema_transformations = {"generate_data_based_on"}
+
+# Streaming versions of the transformations that need the whole column, for
+# the batch pipeline. Called with the transformation params and the schema,
+# they return an operator that is called on every batch and keeps its state.
+streaming_transformations = {"generate_data_based_on": CounterOperator}
+
+def apply_transformations(data, transformations, schema=None):
+    """
+    Apply transformation strings or compiled Transformations in order.
+    schema is passed on to the transformations that read rules from the mapping schema.
+    """
     for transformation in transformations:
-        func_name = transformation
-        params = []
-
-        # Check if transformation has parameters
-        if "(" in transformation:
-            func_name = transformation.split("(")[0]
-            params_str = transformation.split("(")[1].rstrip(")")
-            params = [param.strip() for param in params_str.split(",") if param.strip()]
-
-        func = transformation_functions.get(func_name)
-        if func:
-            print(f"Applying transformation: {func_name} with params: {params}")
-            if isinstance(data, list):
-                data = func(data, *params)
-            else:
-                data = func(data, *params)
+        if isinstance(transformation, str):
+            transformation = parse_transformation(
+                transformation, transformation_functions
+            )
+            if transformation is None:
+                continue
+        print(
+            f"Applying transformation: {transformation.name} with params: {list(transformation.params)}"
+        )
+        with measure("transformation", transformation.name, count_rows(data)):
+            data = apply_transformation(data, transformation, schema)
     return data
 
-def validate_data(data, validations):
-    for validation in validations:
-        if validation["type"] == "required":
-            if isinstance(data, list):
-                if not data:  # Empty list is invalid for required field
-                    raise ValueError(validation["message"])
-                for item in data:
-                    if isinstance(item, list):
-                        if all(
-                            not sub_item
-                            or (isinstance(sub_item, str) and not sub_item.strip())
-                            for sub_item in item
-                        ):
-                            raise ValueError(validation["message"])
-                    elif not item or (isinstance(item, str) and not item.strip()):
-                        raise ValueError(validation["message"])
-            elif not data or (isinstance(data, str) and not data.strip()):
-                raise ValueError(validation["message"])
-        elif validation["type"] == "allow-empty":
-            pass
-
-def read_and_validate_data(input_path, mapping_schema):
-    workbook = load_workbook(input_path, data_only=True)
-    data_store = {}
+def apply_transformation(data, transformation, schema=None):
+    """Apply one compiled Transformation to a value or column"""
+    column_func = column_transformations.get(transformation.name)
+    if column_func is not None and is_column(data):
+        data = column_func(data, *transformation.params)
+    elif schema is not None and transformation.name in schema_transformations:
+        data = transformation.func(to_list(data), *transformation.params, schema=schema)
+    else:
+        # Per-value functions expect plain lists
+        data = transformation(to_list(data))
+    if isinstance(data, list):
+        data = make_column(data)
+    return data
 
-    # First pass: get the maximum data length from fields with source
-    max_data_length = 0
-    for mapping in mapping_schema["mappings"]:
-        if "source" in mapping:
-            source = mapping["source"]
-            sheet_name = source["sheet"]
-            cell_range = source["range"]
-            sheet = workbook[sheet_name]
-
-            if cell_range.endswith("_"):
-                start_cell = cell_range.split(":")[0]
-                start_row = int(start_cell[1:])
-                max_data_length = max(max_data_length, sheet.max_row - start_row + 1)
-
-    # Second pass: process all fields
-    for mapping in mapping_schema["mappings"]:
-        field_name = mapping["field_name"]
-        default_value = mapping.get("default")
-
-        # Special handling for fields that depend on other fields
-        if "reference_field" in mapping:
-            # Use the referenced field's data for transformations
-            reference_field = mapping["reference_field"]
-            if reference_field not in data_store:
-                raise ValueError(
-                    f"Reference field {reference_field} must be processed before {field_name}"
-                )
-            data = data_store[reference_field]  # Use reference field's data
+def is_blank(value):
+    return not value or (isinstance(value, str) and not value.strip())
+
+def required_messages(validations):
+    """Messages of the "required" validations ("allow-empty" needs no check)"""
+    return [validation["message"] for validation in validations or () if validation["type"] == "required"]
+
+def validation_failures(data, validations):
+    """(row offset or None, message) of every violation in data, found in one walk of it"""
+    messages = required_messages(validations)
+    if not messages:
+        return
+    if isinstance(data, ConstantColumn) and data:
+        # Every row holds the same value, check it once
+        failed_rows = [None] if is_blank(data.value) else []
+    elif is_column(data):
+        if not data:  # Empty list is invalid for required field
+            failed_rows = [None]
         else:
-            # Normal field processing with source
-            if "source" not in mapping:
-                if default_value is not None:
-                    if (
-                        isinstance(mapping["destination"][0]["range"], str)
-                        and ":" in mapping["destination"][0]["range"]
-                    ):
-                        # For range destinations, create list of default values matching max length
-                        data = [default_value] * max_data_length
-                    else:
-                        # For single cell destinations, use single value
-                        data = default_value
-                    data_store[field_name] = data
-                continue
+            failed_rows = [
+                offset
+                for offset, item in enumerate(data)
+                if (all(map(is_blank, item)) if isinstance(item, list) else is_blank(item))
+            ]
+    else:
+        failed_rows = [None] if is_blank(data) else []
+    for offset in failed_rows:
+        for message in messages:
+            yield offset, message
 
-            source = mapping["source"]
-            sheet_name = source["sheet"]
-            cell_range = source["range"]
-            sheet = workbook[sheet_name]
+def validate_data(data, validations):
+    """Raise a ValueError with the message of the first violation in data"""
+    for offset, message in validation_failures(data, validations):
+        raise ValueError(message)
 
-            # Check validation requirements
-            is_required = any(
-                validation.get("type") == "required"
-                for validation in mapping.get("validation", [])
+def resolve_column(values, field, report, sheet=None, first_row=1, column=None):
+    """
+    Resolve the values of a dynamic range following the empty-value rules and
+    check its required validations in the same pass. Violations are added to
+    report with their cells (the values start at first_row of column).
+    """
+    # Priority order for handling empty/null values:
+    # 1. If value exists, use it
+    # 2. If empty and has default value, use default
+    # 3. If empty, no default, but required - violation
+    # 4. If empty, no default, allows_none - use empty space
+    # 5. Otherwise keep as null
+    field_name = field.field_name
+    default_value = field.default
+    messages = required_messages(field.validations)
+    resolved = []
+    append = resolved.append
+    for row, value in enumerate(values, start=first_row):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            if default_value is not None:
+                # Default value takes highest priority for empty fields
+                value = default_value
+            elif field.is_required:
+                # Required fields must have a value
+                report.add(field_name, f"{field_name} is required but found empty value", sheet, column, row)
+                append(value)
+                continue
+            elif field.allows_none:
+                # If field allows empty and has no default, use space
+                value = " "
+        if messages and is_blank(value):
+            for message in messages:
+                report.add(field_name, message, sheet, column, row)
+        append(value)
+    if not resolved:
+        # Empty list is invalid for required field
+        for message in messages:
+            report.add(field_name, message, sheet, column, first_row)
+    return resolved
+
+def header_column(header_row, field):
+    """Source range of a field moved to the column whose header (the row above the range) is field.source_column"""
+    cell_range = field.source_range
+    column_name = str(field.source_column).strip().casefold()
+    for col_idx, value in enumerate(header_row, start=1):
+        if value is not None and str(value).strip().casefold() == column_name:
+            return cell_range._replace(
+                min_col=col_idx, max_col=col_idx + cell_range.max_col - cell_range.min_col
             )
-            allows_none = any(
-                validation.get("type") == "allow-empty"
-                for validation in mapping.get("validation", [])
+    raise ValueError(
+        f"Column '{field.source_column}' of {field.field_name} not found in row {cell_range.min_row - 1} of {field.source_sheet}"
+    )
+
+def read_sources(workbook, plan):
+    """
+    Read the raw source values of every mapping that has a source.
+    Returns a dict of mapping index -> raw data, the max dynamic range length
+    and a dict of mapping index -> (column, row) of the first source cell.
+    """
+    source_data = {}
+    source_cells = {}
+    max_data_length = 0
+    for field in plan.fields:
+        if field.source_range is None:
+            continue
+        cell_range = field.source_range
+        sheet = workbook[field.source_sheet]
+        if field.source_column is not None:
+            header_row = cell_range.min_row - 1
+            cell_range = header_column(
+                next(sheet.iter_rows(min_row=header_row, max_row=header_row, values_only=True), ()),
+                field,
             )
+        source_cells[field.index] = (cell_range.min_col, cell_range.min_row)
 
-            # Handle special cases for dynamic ranges
-            if cell_range.endswith("_"):
-                start_cell = cell_range.split(":")[0]
-                col_letter = start_cell[0]
-                start_row = int(start_cell[1:])
-                data = []
-                col_idx = column_index_from_string(col_letter)
+        if is_dynamic(cell_range):
+            # Handle dynamic ranges
+            start_row = cell_range.min_row
+            max_data_length = max(max_data_length, sheet.max_row - start_row + 1)
+            source_data[field.index] = [
+                row[0]
                 for row in sheet.iter_rows(
                     min_row=start_row,
-                    min_col=col_idx,
-                    max_col=col_idx,
+                    min_col=cell_range.min_col,
+                    max_col=cell_range.min_col,
                     values_only=True,
-                ):
-                    value = row[0]
-                    # Priority order for handling empty/null values:
-                    # 1. If value exists, use it
-                    # 2. If empty and has default value, use default
-                    # 3. If empty, no default, but required - raise error
-                    # 4. If empty, no default, allows_none - use empty space
-                    # 5. Otherwise keep as null
-                    if value is None or (isinstance(value, str) and not value.strip()):
-                        if default_value is not None:
-                            # Default value takes highest priority for empty fields
-                            data.append(default_value)
-                        elif is_required:
-                            # Required fields must have a value
-                            raise ValueError(
-                                f"{field_name} is required but found empty value"
-                            )
-                        elif allows_none:
-                            # If field allows empty and has no default, use space
-                            data.append(" ")
-                        else:
-                            # Keep as null if no other conditions apply
-                            data.append(value)
-                    else:
-                        data.append(value)
-            else:
-                # Handle fixed ranges and single cells
-                if ":" in cell_range:
-                    start_cell, end_cell = cell_range.split(":")
-                    start_col = column_index_from_string(start_cell[0])
-                    start_row = int(start_cell[1:])
-                    end_col = column_index_from_string(end_cell[0])
-                    end_row = int(end_cell[1:])
-                    data = []
-                    for row in sheet.iter_rows(
-                        min_row=start_row,
-                        max_row=end_row,
-                        min_col=start_col,
-                        max_col=end_col,
-                        values_only=True,
-                    ):
-                        if all(cell is None for cell in row):
-                            continue
-                        data.extend([cell for cell in row if cell is not None])
-                else:
-                    # Single cell case
-                    cell = sheet[cell_range]
-                    data = cell.value
+                )
+            ]
+        elif not is_single_cell(cell_range):
+            # Handle fixed ranges
+            data = []
+            for row in sheet.iter_rows(
+                min_row=cell_range.min_row,
+                max_row=cell_range.max_row,
+                min_col=cell_range.min_col,
+                max_col=cell_range.max_col,
+                values_only=True,
+            ):
+                data.extend([cell for cell in row if cell is not None])
+            source_data[field.index] = data
+        else:
+            # Single cell case
+            source_data[field.index] = sheet.cell(
+                row=cell_range.min_row, column=cell_range.min_col
+            ).value
+    return source_data, max_data_length, source_cells
 
-        # Validate data if any validations are specified
-        if "validation" in mapping:
-            # print(f"Validating {field_name}")
-            validate_data(data, mapping["validation"])
+def stream_sources(workbook, plan):
+    """
+    Read the raw source values of every mapping that has a source, walking each
+    source sheet exactly once and fanning every row out to the mappings that
+    reference it. Works on read-only workbooks.
+    Returns the same structure as read_sources.
+    """
+    # Group source ranges by sheet so each sheet is only walked once
+    readers_by_sheet = {}
+    for field in plan.fields:
+        if field.source_range is not None:
+            readers_by_sheet.setdefault(field.source_sheet, []).append(field)
+
+    source_data = {}
+    source_cells = {}
+    max_data_length = 0
+    for sheet_name, fields in readers_by_sheet.items():
+        sheet = workbook[sheet_name]
+        readers = []
+        # Readers whose column is found by header name, by header row
+        header_readers = {}
+        for field in fields:
+            cell_range = field.source_range
+            if is_dynamic(cell_range):
+                kind = "dynamic"
+            elif is_single_cell(cell_range):
+                kind = "single"
+            else:
+                kind = "fixed"
+            source_data[field.index] = None if kind == "single" else []
+            if field.source_column is not None:
+                header_readers.setdefault(cell_range.min_row - 1, []).append(
+                    (len(readers), kind, field)
+                )
+            readers.append((field.index, kind, *cell_range[1:]))
+
+        # Read-only sheets report the declared dimension, which is often padded
+        # with empty rows. Only count rows that actually contain cells, the
+        # same way a fully loaded worksheet computes max_row.
+        sheet.reset_dimensions()
+        row_count = 1
+        for row_idx, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+            row_length = len(row)
+            if row_length:
+                row_count = row_idx
+            if row_idx in header_readers:
+                # The header row comes before the rows of these readers
+                for position, kind, field in header_readers.pop(row_idx):
+                    readers[position] = (field.index, kind, *header_column(row, field)[1:])
+            for index, kind, min_col, min_row, max_col, max_row in readers:
+                if row_idx < min_row or (max_row is not None and row_idx > max_row):
+                    continue
+                if kind == "dynamic":
+                    source_data[index].append(row[min_col - 1] if min_col <= row_length else None)
+                elif kind == "fixed":
+                    source_data[index].extend(
+                        [cell for cell in row[min_col - 1:max_col] if cell is not None]
+                    )
+                elif min_col <= row_length:
+                    source_data[index] = row[min_col - 1]
+
+        if header_readers:
+            header_row, pending = next(iter(header_readers.items()))
+            field = pending[0][2]
+            raise ValueError(
+                f"Column '{field.source_column}' of {field.field_name} not found: {sheet_name} has no row {header_row}"
+            )
+        for index, kind, min_col, min_row, *_ in readers:
+            source_cells[index] = (min_col, min_row)
+            if kind == "dynamic":
+                # Drop trailing rows without cells
+                del source_data[index][max(row_count - min_row + 1, 0):]
+                max_data_length = max(max_data_length, row_count - min_row + 1)
+    return source_data, max_data_length, source_cells
+
+def reader_backend(reader=None):
+    """The reader backend of a job: reader, else READER_BACKEND, else the one STREAMING_READ implies"""
+    if reader is not None:
+        return reader
+    if READER_BACKEND is not None:
+        return READER_BACKEND
+    return "openpyxl-readonly" if STREAMING_READ else "openpyxl"
+
+def read_and_validate_data(
+    input_path, mapping_schema, streaming=False, input_type="excel", reader=None, encoding=None
+):
+    """
+    Read, default and validate all mapped fields of an input file.
+    reader is the workbook reader backend; without it streaming=True reads with
+    openpyxl-readonly and streaming=False with openpyxl. Every backend but
+    openpyxl walks each source sheet exactly once for all mappings instead of
+    once per mapping. CSV and Parquet inputs (input_type "csv" or "parquet")
+    are always streamed; encoding is the text encoding of a CSV input
+    (default: tabular_sources.CSV_ENCODING).
+    Every value is validated once; all violations are raised together as a
+    ValidationError with their cells.
+    """
+    if reader is None:
+        reader = "openpyxl-readonly" if streaming else "openpyxl"
+    plan = get_mapping_plan(mapping_schema)
+    with measure("load", "workbook"):
+        if input_type in TABULAR_TYPES:
+            workbook = open_tabular(input_path, input_type, encoding)
+            streaming = True
+        else:
+            workbook = open_values_workbook(input_path, reader)
+            streaming = reader != "openpyxl"
+    try:
+        with measure("sources", "read"):
+            if streaming:
+                source_data, max_data_length, source_cells = stream_sources(workbook, plan)
+            else:
+                source_data, max_data_length, source_cells = read_sources(workbook, plan)
+    finally:
+        if streaming:
+            workbook.close()
 
-        # Store the data
-        data_store[field_name] = data
+    source = input_path if isinstance(input_path, (str, os.PathLike)) else getattr(input_path, "name", None)
+    report = ValidationReport(source)
+    data_store = {}
+    # Field name -> (sheet, column, first row, one row per value) of the cells its values come from
+    locations = {}
+    for field in plan.fields:
+        with measure("field", field.field_name) as field_measurement:
+            validated = False
+            field_name = field.field_name
+            default_value = field.default
+
+            # Special handling for fields that depend on other fields
+            if field.reference_field is not None:
+                # Use the referenced field's data for transformations
+                reference_field = field.reference_field
+                if reference_field not in data_store:
+                    raise ValueError(
+                        f"Reference field {reference_field} must be processed before {field_name}"
+                    )
+                data = data_store[reference_field]  # Use reference field's data
+                sheet, column, first_row, per_row = locations.get(reference_field, (None, None, None, False))
+            else:
+                # Normal field processing with source
+                if field.source_range is None:
+                    if default_value is not None:
+                        if field.destinations and any(
+                            not is_single_cell(cell_range)
+                            for cell_range in field.destinations[0].ranges
+                        ):
+                            # For range destinations, a constant column of the default matching max length
+                            data = ConstantColumn(default_value, max_data_length)
+                        else:
+                            # For single cell destinations, use single value
+                            data = default_value
+                        data_store[field_name] = data
+                        if field_measurement is not None:
+                            field_measurement.rows = count_rows(data)
+                    continue
+
+                data = source_data[field.index]
+                column, first_row = source_cells[field.index]
+                sheet, per_row = field.source_sheet, is_dynamic(field.source_range)
+                locations[field_name] = (sheet, column, first_row, per_row)
+
+                # Handle special cases for dynamic ranges
+                if per_row:
+                    # Resolved and validated in one pass
+                    data = resolve_column(data, field, report, sheet, first_row, column)
+                    validated = True
+
+            # Validate data if any validations are specified
+            if field.validations is not None and not validated:
+                # print(f"Validating {field_name}")
+                for offset, message in validation_failures(data, field.validations):
+                    row = first_row + offset if per_row and offset is not None else first_row
+                    report.add(field_name, message, sheet, column, row)
+
+            # Store the data
+            if isinstance(data, list):
+                data = make_column(data)
+            data_store[field_name] = data
+            if field_measurement is not None:
+                field_measurement.rows = count_rows(data)
+    report.raise_errors()
     # pprint(data_store)
     return data_store
 
 def apply_transformations_to_data_store(data_store, mapping_schema):
+    plan = get_mapping_plan(mapping_schema)
     for field_name, data in data_store.items():
-        for mapping in mapping_schema["mappings"]:
-            if mapping["field_name"] == field_name:
-                if "transformations" in mapping:
+        for field in plan.fields_by_name.get(field_name, ()):
+            if field.transformations:
+                with measure("field", field_name, count_rows(data)):
                     data_store[field_name] = apply_transformations(
-                        data, mapping["transformations"]
+                        data, field.transformations, mapping_schema
                     )
     return data_store
 
 
-def apply_cell_format(cell, format_config):
-    if not format_config:
-        return
+# Interned style objects per format config content, so identical configs
+# share the same objects
+interned_styles = {}
+# Style collection ids per format config, per workbook. Entries go away with
+# the workbook of the job, so config ids are only trusted while it's alive.
+workbook_style_ids = WeakKeyDictionary()
+
+def build_cell_styles(format_config):
+    """
+    Create the style objects for a format config.
+    Returns a tuple of (StyleArray key, workbook collection, style object).
+    """
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    styles = []
 
     # Create Font object
     if "font" in format_config:
-        font_config = format_config["font"].copy()
-        cell.font = Font(**font_config)
+        styles.append(("fontId", "_fonts", Font(**format_config["font"])))
 
     # Create Fill object
     if "fill" in format_config:
@@ -404,7 +713,7 @@ def apply_cell_format(cell, format_config):
             fill_config["patternType"] = fill_config.pop("type")
         if "color" in fill_config:
             fill_config["fgColor"] = fill_config.pop("color")
-        cell.fill = PatternFill(**fill_config)
+        styles.append(("fillId", "_fills", PatternFill(**fill_config)))
 
     # Create Border object
     if "border" in format_config:
@@ -415,46 +724,127 @@ def apply_cell_format(cell, format_config):
         # Only apply borders if style is not "none"
         if border_style.lower() != "none":
             side = Side(style=border_style, color=border_color)
-            cell.border = Border(left=side, right=side, top=side, bottom=side)
+            border = Border(left=side, right=side, top=side, bottom=side)
+            styles.append(("borderId", "_borders", border))
 
     # Create Alignment object
     if "alignment" in format_config:
-        alignment_config = format_config["alignment"].copy()
-        cell.alignment = Alignment(**alignment_config)
-        
+        styles.append(("alignmentId", "_alignments", Alignment(**format_config["alignment"])))
+
+    return tuple(styles)
+
+def get_cell_styles(format_config):
+    """Return the interned style objects for a format config"""
+    key = json.dumps(format_config, sort_keys=True)
+    styles = interned_styles.get(key)
+    if styles is None:
+        styles = interned_styles[key] = build_cell_styles(format_config)
+    return styles
+
+def get_style_ids(workbook, format_config):
+    """Return the (StyleArray key, id) pairs of a format config in a workbook"""
+    style_ids = workbook_style_ids.get(workbook)
+    if style_ids is None:
+        style_ids = workbook_style_ids[workbook] = {}
+    cached = style_ids.get(id(format_config))
+    # The config is kept in the cache entry, so its id can't be reused
+    # while the workbook is alive
+    if cached is not None and cached[0] is format_config:
+        return cached[1]
+
+    ids = tuple(
+        (key, getattr(workbook, collection).add(style))
+        for key, collection, style in get_cell_styles(format_config)
+    )
+    style_ids[id(format_config)] = (format_config, ids)
+    return ids
+
+def set_style_ids(cell, style_ids):
+    """
+    Point a cell (or a row/column dimension) at resolved style ids, the same
+    ids assigning cell.font, cell.fill, etc. would produce
+    """
+    if cell._style is None:
+        from openpyxl.styles.cell_style import StyleArray
 
-def format_range(sheet, cell_range, format_config):
-    """Apply formatting to a range of cells"""
+        cell._style = StyleArray()
+    style = cell._style
+    for key, style_id in style_ids:
+        setattr(style, key, style_id)
+
+def apply_cell_format(cell, format_config):
     if not format_config:
         return
-        
-    if ":" in cell_range:
-        if cell_range.endswith("_"):
+    set_style_ids(cell, get_style_ids(cell.parent.parent, format_config))
+
+def format_cells(sheet, min_row, min_col, max_row, max_col, format_config):
+    """Apply one format to every cell of a rectangular range, resolving its styles once"""
+    if not format_config or max_row < min_row:
+        return
+    style_ids = get_style_ids(sheet.parent, format_config)
+    for row in range(min_row, max_row + 1):
+        for col in range(min_col, max_col + 1):
+            set_style_ids(sheet.cell(row=row, column=col), style_ids)
+
+def format_columns(sheet, min_col, max_col, format_config):
+    """
+    Apply one format to whole columns through their column styles, without
+    touching the cells. Cells with no style of their own show the column style.
+    """
+    from openpyxl.utils import get_column_letter
+
+    if not format_config:
+        return
+    style_ids = get_style_ids(sheet.parent, format_config)
+    for col in range(min_col, max_col + 1):
+        set_style_ids(sheet.column_dimensions[get_column_letter(col)], style_ids)
+
+def format_range(sheet, cell_range, format_config, row_count=None):
+    """
+    Apply formatting to a range of cells, a dynamic range or whole columns ("C:E").
+    A dynamic range is formatted over row_count rows, the number of rows
+    written to it; without row_count it extends to the last non-empty cell
+    of its column.
+    """
+    if not format_config:
+        return
+
+    column_span = parse_column_span(cell_range)
+    if column_span is not None:
+        format_columns(sheet, *column_span, format_config)
+        return
+
+    parsed_range = parse_range(cell_range)
+    if not is_single_cell(parsed_range):
+        if is_dynamic(parsed_range):
             # Handle dynamic ranges
-            start_cell = cell_range.split(":")[0]
-            col_letter = start_cell[0]
-            start_row = int(start_cell[1:])
-            
-            # Find the last row with data in this column
-            last_row = start_row
-            col_idx = column_index_from_string(col_letter)
-            for row in sheet.iter_rows(min_row=start_row, min_col=col_idx, max_col=col_idx):
-                if row[0].value is not None:
-                    last_row = row[0].row
-            
+            start_row = parsed_range.min_row
+            col_idx = parsed_range.min_col
+
+            if row_count is not None:
+                last_row = start_row + max(row_count, 1) - 1
+            else:
+                # Find the last row with data in this column
+                last_row = start_row
+                for row in sheet.iter_rows(min_row=start_row, min_col=col_idx, max_col=col_idx):
+                    if row[0].value is not None:
+                        last_row = row[0].row
+
             # Apply formatting from start_row to last_row
-            for row in range(start_row, last_row + 1):
-                cell = sheet[f"{col_letter}{row}"]
-                apply_cell_format(cell, format_config)
+            format_cells(sheet, start_row, col_idx, last_row, col_idx, format_config)
         else:
             # Handle fixed ranges
-            start_cell, end_cell = cell_range.split(":")
-            for row in sheet[cell_range]:
-                for cell in row:
-                    apply_cell_format(cell, format_config)
+            format_cells(
+                sheet,
+                parsed_range.min_row,
+                parsed_range.min_col,
+                parsed_range.max_row,
+                parsed_range.max_col,
+                format_config,
+            )
     else:
         # Handle single cell
-        apply_cell_format(sheet[cell_range], format_config)
+        apply_cell_format(sheet[parsed_range.text], format_config)
 
 
 def apply_conditional_format(sheet, row_index, format_config, data_store, condition):
@@ -470,159 +860,492 @@ def apply_conditional_format(sheet, row_index, format_config, data_store, condit
     if not field_data or row_index >= len(field_data):
         return
 
-    # Check if condition is met
+    # Check if condition is met. The format is interned by apply_cell_format,
+    # which also converts the fill keys
     if field_data[row_index] == expected_value:
-        cell_format = condition["apply"]
-        # Convert format keys if needed
-        if "fill" in cell_format:
-            fill_config = cell_format["fill"].copy()
-            if "type" in fill_config:
-                fill_config["patternType"] = fill_config.pop("type")
-            if "color" in fill_config:
-                fill_config["fgColor"] = fill_config.pop("color")
-            cell_format["fill"] = fill_config
-        return cell_format
+        return condition["apply"]
     return None
 
 
-def use_mapping_generate_output(data_store, mapping_schema, output_file_path):
-    """Generate an Excel output file based on mapping schema and data store"""
-    try:
-        output_workbook = load_workbook(output_file_path)
-    except FileNotFoundError:
-        output_workbook = Workbook()
+def excel_literal(value):
+    """A condition value as an Excel formula literal, or None if it has none"""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str) and value:
+        return '"' + value.replace('"', '""') + '"'
+    return None
 
-    # Get default formats
-    default_formats = mapping_schema.get("default_formats", {})
+def condition_formula(value, reference):
+    """Formula matching the Python == comparison of a cell with a condition value"""
+    literal = excel_literal(value)
+    if literal is None:
+        return None
+    if isinstance(value, str):
+        # = ignores case in Excel
+        return f"EXACT({reference},{literal})"
+    # Blank cells equal 0 and FALSE in Excel
+    check = "ISLOGICAL" if isinstance(value, bool) else "ISNUMBER"
+    return f"AND({check}({reference}),{reference}={literal})"
+
+def condition_column(plan, sheet_name, field_name):
+    """
+    (column, start row) of a dynamic range field_name is written to on a
+    sheet, where no other dynamic range writes to the same column, or None
+    """
+    writers = {}
+    for field in plan.fields:
+        for destination in field.destinations:
+            if destination.sheet != sheet_name:
+                continue
+            for cell_range in destination.ranges:
+                if is_dynamic(cell_range):
+                    writers.setdefault(cell_range.min_col, []).append(
+                        (field.field_name, cell_range.min_row)
+                    )
+    for column, column_writers in writers.items():
+        if len(column_writers) == 1 and column_writers[0][0] == field_name:
+            return column, column_writers[0][1]
+    return None
 
-    for mapping in mapping_schema["mappings"]:
-        field_name = mapping["field_name"]
-        destinations = mapping["destination"]
-        data = data_store.get(field_name, [])
+def native_conditional_formats(plan, data_store):
+    """
+    Compile the conditional_format blocks of the dynamic destinations into
+    worksheet rules over exactly the rows that are written.
+    Returns [(destination, range, rule)].
+
+    A block is compiled when the condition field is written unsplit to the
+    only dynamic range of its column on the same sheet, its value is a
+    string, number or bool, and its format only sets font, fill and border.
+    Other blocks are left to the per-row evaluation.
+    """
+    from openpyxl.formatting.rule import Rule
+    from openpyxl.styles import PatternFill
+    from openpyxl.styles.differential import DifferentialStyle
+    from openpyxl.utils import get_column_letter
+
+    rules = []
+    if not NATIVE_CONDITIONAL_FORMATS:
+        return rules
+
+    for field in plan.fields:
+        data = data_store.get(field.field_name, [])
+        if not is_column(data) or not data:
+            continue
+        for destination in field.destinations:
+            condition = destination.conditional_format
+            if not condition or "when" not in condition:
+                continue
+            format_config = condition.get("apply") or {}
+            if not format_config or set(format_config) - {"font", "fill", "border"}:
+                continue
+            field_name = condition["when"]["field"]
+            condition_data = data_store.get(field_name)
+            column = condition_column(plan, destination.sheet, field_name)
+            if (
+                column is None
+                or not is_column(condition_data)
+                or isinstance(condition_data, SplitColumn)
+                or any(isinstance(value, list) for value in condition_data)
+            ):
+                continue
+            formula = condition_formula(
+                condition["when"]["equals"], f"${get_column_letter(column[0])}{column[1]}"
+            )
+            if formula is None:
+                continue
 
-        for destination in destinations:
-            sheet_name = destination["sheet"]
-            
-            # Get or create sheet
-            if sheet_name in output_workbook.sheetnames:
-                sheet = output_workbook[sheet_name]
-            else:
-                sheet = output_workbook.create_sheet(sheet_name)
+            # The differential style uses the same style objects as the per-row format
+            styles = {
+                collection: style for key, collection, style in get_cell_styles(format_config)
+            }
+            fill = styles.get("_fills")
+            if fill is not None:
+                # Excel paints solid fills of conditional formats with the background color
+                fill = PatternFill(
+                    patternType=fill.patternType, fgColor=fill.fgColor, bgColor=fill.fgColor
+                )
+            rule = Rule(
+                type="expression",
+                formula=[formula],
+                dxf=DifferentialStyle(
+                    font=styles.get("_fonts"), fill=fill, border=styles.get("_borders")
+                ),
+            )
+            for cell_range in destination.ranges:
+                if is_dynamic(cell_range):
+                    letter = get_column_letter(cell_range.min_col)
+                    end_row = cell_range.min_row + len(data) - 1
+                    rules.append(
+                        (destination, f"{letter}{cell_range.min_row}:{letter}{end_row}", rule)
+                    )
+    return rules
 
-            # Process each range in the destination
-            for idx, cell_range in enumerate(destination["range"].split(",")):
-                cell_range = cell_range.strip()  # Remove whitespace
-                
-                if ":" in cell_range:
-                    if cell_range.endswith("_"):
-                        # Handle dynamic ranges
-                        start_cell = cell_range.split(":")[0]
-                        col_letter = start_cell[0]
-                        start_row = int(start_cell[1:])
+def add_conditional_format_rules(workbook, rules):
+    """Add compiled conditional format rules to the sheets of a workbook"""
+    for destination, cell_range, rule in rules:
+        if destination.sheet in workbook.sheetnames:
+            sheet = workbook[destination.sheet]
+        else:
+            sheet = workbook.create_sheet(destination.sheet)
+        sheet.conditional_formatting.add(cell_range, rule)
+
+def base_format(destination, default_formats):
+    """The format of a destination's cells: its own format, else the data_cells default"""
+    if destination.format is not None:
+        return destination.format
+    return default_formats.get("data_cells")
+
+def write_dynamic_cell(cell, value, idx, destination, style_ids, data_store, row_offset, sheet, conditional=True):
+    """
+    Write one value of a dynamic range and apply its formatting.
+    style_ids are the resolved ids of the base format, or None when the
+    range was already formatted in bulk.
+    With conditional=False the destination's conditional_format is left to a native rule.
+    """
+    # Handle 2D array data
+    if isinstance(value, list):
+        if idx < len(value):
+            cell.value = value[idx]
+    else:
+        cell.value = value
+
+    # Apply base formatting
+    if style_ids:
+        set_style_ids(cell, style_ids)
+
+    # Apply conditional formatting if specified
+    if conditional and destination.conditional_format is not None:
+        cond_format = apply_conditional_format(
+            sheet,
+            row_offset,
+            destination.format,
+            data_store,
+            destination.conditional_format
+        )
+        if cond_format:
+            apply_cell_format(cell, cond_format)
+
+
+def write_mapped_data(output_workbook, plan, data_store, include_dynamic=True):
+    """
+    Write every mapped field into its destinations in the workbook.
+    With include_dynamic=False the dynamic ("_"-terminated) ranges are skipped,
+    leaving only the bounded part of the output.
+    """
+    # Get default formats
+    default_formats = plan.default_formats
+    rules = native_conditional_formats(plan, data_store) if include_dynamic else []
+    native = {id(destination) for destination, cell_range, rule in rules}
+
+    for field in plan.fields:
+        data = data_store.get(field.field_name, [])
+        with measure("field", field.field_name, count_rows(data)):
+            write_field(
+                output_workbook, field, data, data_store, default_formats, include_dynamic, native
+            )
+    add_conditional_format_rules(output_workbook, rules)
+
+def write_field(output_workbook, field, data, data_store, default_formats, include_dynamic, native=()):
+    """
+    Write one mapped field into its destinations.
+    native holds the ids of the destinations whose conditional_format is a native rule.
+    """
+    for destination in field.destinations:
+        sheet_name = destination.sheet
+            
+        # Get or create sheet
+        if sheet_name in output_workbook.sheetnames:
+            sheet = output_workbook[sheet_name]
+        else:
+            sheet = output_workbook.create_sheet(sheet_name)
+
+        # Process each range in the destination
+        for idx, cell_range in enumerate(destination.ranges):
+            if not is_single_cell(cell_range):
+                if is_dynamic(cell_range):
+                    if not include_dynamic:
+                        continue
+                    # Handle dynamic ranges
+                    start_col = cell_range.min_col
+                    start_row = cell_range.min_row
+
+                    # Format the written rows in bulk, then write the data
+                    # and apply the conditional formatting
+                    format_cells(
+                        sheet,
+                        start_row,
+                        start_col,
+                        start_row + len(data) - 1,
+                        start_col,
+                        base_format(destination, default_formats),
+                    )
+                    conditional = id(destination) not in native
+                    for row_offset, value in enumerate(data):
+                        cell = sheet.cell(row=start_row + row_offset, column=start_col)
+                        write_dynamic_cell(
+                            cell,
+                            value,
+                            idx,
+                            destination,
+                            None,
+                            data_store,
+                            row_offset,
+                            sheet,
+                            conditional,
+                        )
+                    
+                else:
+                    # Handle fixed ranges
+                    start_col = cell_range.min_col
+                    start_row = cell_range.min_row
+                    end_row = cell_range.max_row
                         
-                        # Write data and apply formatting
-                        for row_offset, value in enumerate(data):
-                            cell = sheet[f"{col_letter}{start_row + row_offset}"]
-                            
+                    # Write data
+                    for row_offset, value in enumerate(data):
+                        if start_row + row_offset <= end_row:
+                            cell = sheet.cell(row=start_row + row_offset, column=start_col)
+                                
                             # Handle 2D array data
                             if isinstance(value, list):
                                 if idx < len(value):
                                     cell.value = value[idx]
                             else:
                                 cell.value = value
-                            
-                            # Apply base formatting
-                            if "format" in destination:
-                                apply_cell_format(cell, destination["format"])
-                            elif "data_cells" in default_formats:
-                                apply_cell_format(cell, default_formats["data_cells"])
-                            
-                            # Apply conditional formatting if specified
-                            if "conditional_format" in destination:
-                                cond_format = apply_conditional_format(
-                                    sheet,
-                                    row_offset,
-                                    destination["format"],
-                                    data_store,
-                                    destination["conditional_format"]
-                                )
-                                if cond_format:
-                                    apply_cell_format(cell, cond_format)
-                    
-                    else:
-                        # Handle fixed ranges
-                        start_cell, end_cell = cell_range.split(":")
-                        start_col = column_index_from_string(start_cell[0])
-                        start_row = int(start_cell[1:])
-                        end_row = int(end_cell[1:])
-                        
-                        # Write data and apply formatting
-                        for row_offset, value in enumerate(data):
-                            if start_row + row_offset <= end_row:
-                                cell = sheet.cell(row=start_row + row_offset, column=start_col)
-                                
-                                # Handle 2D array data
-                                if isinstance(value, list):
-                                    if idx < len(value):
-                                        cell.value = value[idx]
-                                else:
-                                    cell.value = value
-                                
-                                # Apply formatting
-                                if "format" in destination:
-                                    apply_cell_format(cell, destination["format"])
-                                elif "data_cells" in default_formats:
-                                    apply_cell_format(cell, default_formats["data_cells"])
+
+                    # Apply formatting to the written rows in bulk
+                    format_cells(
+                        sheet,
+                        start_row,
+                        start_col,
+                        min(end_row, start_row + len(data) - 1),
+                        start_col,
+                        base_format(destination, default_formats),
+                    )
                 
-                else:
-                    # Handle single cell
-                    cell = sheet[cell_range]
-                    if isinstance(data, list) and data:
-                        if isinstance(data[0], list) and idx < len(data[0]):
-                            cell.value = data[0][idx]
-                        else:
-                            cell.value = data[0]
+            else:
+                # Handle single cell
+                cell = sheet.cell(row=cell_range.min_row, column=cell_range.min_col)
+                if is_column(data) and data:
+                    if isinstance(data[0], list) and idx < len(data[0]):
+                        cell.value = data[0][idx]
                     else:
-                        cell.value = data
+                        cell.value = data[0]
+                else:
+                    cell.value = data
                     
-                    # Apply formatting
-                    if "format" in destination:
-                        apply_cell_format(cell, destination["format"])
-                    elif "data_cells" in default_formats:
-                        apply_cell_format(cell, default_formats["data_cells"])
-
-            #* Handle cell merging if specified
-            if "merge" in destination:
-                merge_range = destination["merge"]
-                try:
-                    # Unmerge first if already merged
-                    if merge_range in sheet.merged_cells:
-                        sheet.unmerge_cells(merge_range)
+                # Apply formatting
+                if destination.format is not None:
+                    apply_cell_format(cell, destination.format)
+                elif "data_cells" in default_formats:
+                    apply_cell_format(cell, default_formats["data_cells"])
+
+        #* Handle cell merging if specified
+        if destination.merge is not None:
+            merge_range = destination.merge
+            try:
+                # Unmerge first if already merged
+                if merge_range in sheet.merged_cells:
+                    sheet.unmerge_cells(merge_range)
                     
-                    sheet.merge_cells(merge_range)
-                    # Apply format to merged range
-                    if "format" in destination:
-                        format_range(sheet, merge_range, destination["format"])
-                    elif "data_cells" in default_formats:
-                        format_range(sheet, merge_range, default_formats["data_cells"])
-                except ValueError as e:
-                    print(f"Warning: Could not merge cells {merge_range}: {str(e)}")
+                sheet.merge_cells(merge_range)
+                # Apply format to merged range
+                format_range(
+                    sheet,
+                    merge_range,
+                    base_format(destination, default_formats),
+                    row_count=len(data) if is_column(data) else 1,
+                )
+            except ValueError as e:
+                print(f"Warning: Could not merge cells {merge_range}: {str(e)}")
+
+
+def use_mapping_generate_output(data_store, mapping_schema, output_file_path):
+    """Generate an Excel output file based on mapping schema and data store"""
+    from openpyxl import Workbook, load_workbook
+
+    try:
+        output_workbook = load_workbook(output_file_path)
+    except FileNotFoundError:
+        output_workbook = Workbook()
+
+    write_mapped_data(output_workbook, get_mapping_plan(mapping_schema), data_store)
 
     # Save the workbook
     output_workbook.save(output_file_path)
 
+
+def stream_generate_output(data_store, mapping_schema, template_path, output_file_path):
+    """
+    Generate the same output as use_mapping_generate_output, streaming the rows
+    into a write-only workbook instead of holding every output cell in memory.
+
+    The template and all bounded destinations (single cells, fixed ranges,
+    merges) are rendered in memory first; that part does not grow with the
+    roster. Every sheet is then written once, row by row, with the dynamic
+    range values and formats overlaid on the template cells of that row.
+    """
+    from workbook_stream import close_streamed_sheets, stream_workbook
+
+    plan = get_mapping_plan(mapping_schema)
+    default_formats = plan.default_formats
+
+    with measure("template", "render"):
+        template = open_template(template_path)
+        write_mapped_data(template, plan, data_store, include_dynamic=False)
+        # The streamed sheets take over the template's conditional formatting
+        rules = native_conditional_formats(plan, data_store)
+        add_conditional_format_rules(template, rules)
+        native = {id(destination) for destination, cell_range, rule in rules}
+
+    output_workbook = stream_workbook(template)
+
+    # Dynamic ranges per sheet, in mapping order so later mappings win
+    dynamic_writers = {}
+    for field in plan.fields:
+        data = data_store.get(field.field_name, [])
+        for destination in field.destinations:
+            conditional = id(destination) not in native
+            for idx, cell_range in enumerate(destination.ranges):
+                if is_dynamic(cell_range):
+                    dynamic_writers.setdefault(destination.sheet, []).append(
+                        (
+                            cell_range.min_col,
+                            cell_range.min_row,
+                            data,
+                            idx,
+                            destination,
+                            conditional,
+                            data_store,
+                        )
+                    )
+
+    try:
+        for template_sheet in template.worksheets:
+            with measure("sheet", template_sheet.title) as sheet_measurement:
+                rows = stream_sheet(
+                    output_workbook,
+                    template_sheet,
+                    dynamic_writers.get(template_sheet.title, []),
+                    default_formats,
+                )
+                if sheet_measurement is not None:
+                    sheet_measurement.rows = rows
+    except Exception:
+        close_streamed_sheets(output_workbook)
+        raise
+
+    with measure("save", "output"):
+        output_workbook.save(output_file_path)
+
+def stream_sheet(output_workbook, template_sheet, writers, default_formats):
+    """
+    Append one template sheet to the write-only workbook, with the dynamic
+    range writers overlaid on its rows. Returns the number of rows written.
+
+    A writer is (start column, start row, data, range index, destination,
+    conditional, data store). data is a column, or an iterator of values of
+    unknown length (batch pipeline) that is written until it is exhausted.
+    Conditional formats read their condition fields from the writer's data store.
+
+    Values that land in a cell covered by a merged range are written to the
+    template's MergedCell, so they fail just like write_mapped_data does.
+    """
+    from openpyxl.cell import MergedCell, WriteOnlyCell
+    from workbook_stream import (
+        clone_template_cell,
+        last_dimension_row,
+        row_values,
+        stream_template_sheet,
+        template_rows,
+    )
+
+    sheet = stream_template_sheet(output_workbook, template_sheet)
+    template_cells = template_rows(template_sheet)
+
+    # Rows that only carry dimensions (e.g. a height) are written too
+    max_row = max(max(template_cells, default=0), last_dimension_row(sheet))
+    # Each writer walks its column once, in row order. A split column is
+    # walked through the child column of its part directly.
+    columns = []
+    open_streams = 0
+    for start_col, start_row, data, idx, destination, conditional, data_store in writers:
+        if is_column(data):
+            end_row = start_row + len(data) - 1
+            max_row = max(max_row, end_row)
+            if isinstance(data, SplitColumn) and idx < len(data.children):
+                values = iter(data.children[idx])
+            else:
+                values = iter(data)
+        else:
+            # Streams end when they are exhausted. Empty ones write nothing.
+            first = next(data, STREAM_END)
+            if first is STREAM_END:
+                continue
+            values = chain((first,), data)
+            end_row = None
+            open_streams += 1
+        # The base format's style ids are resolved once per writer
+        style_ids = None
+        format_config = base_format(destination, default_formats)
+        if format_config:
+            style_ids = get_style_ids(output_workbook, format_config)
+        columns.append(
+            [start_col, start_row, end_row, values, idx, destination, style_ids, conditional, data_store]
+        )
+
+    row_idx = 0
+    while row_idx < max_row or open_streams:
+        row_idx += 1
+        row_cells = {
+            col_idx: clone_template_cell(sheet, template_cell)
+            for col_idx, template_cell in template_cells.get(row_idx, {}).items()
+        }
+        for column in columns:
+            start_col, start_row, end_row, values, idx, destination, style_ids, conditional, data_store = column
+            if row_idx < start_row or (end_row is not None and row_idx > end_row):
+                continue
+            value = next(values, STREAM_END)
+            if value is STREAM_END:
+                # Only streams run out, a column ends at its end_row
+                column[2] = row_idx - 1
+                open_streams -= 1
+                continue
+            row_offset = row_idx - start_row
+            template_cell = template_cells.get(row_idx, {}).get(start_col)
+            if isinstance(template_cell, MergedCell):
+                cell = template_cell
+            else:
+                cell = row_cells.get(start_col)
+                if cell is None:
+                    cell = row_cells[start_col] = WriteOnlyCell(sheet)
+            write_dynamic_cell(
+                cell,
+                value,
+                idx,
+                destination,
+                style_ids,
+                data_store,
+                row_offset,
+                sheet,
+                conditional,
+            )
+        if row_idx > max_row and not row_cells and not open_streams:
+            # The last streams ran out on this row
+            row_idx -= 1
+            break
+        sheet.append(row_values(row_cells))
+
+    return row_idx
+
 def merge_data_stores(data_stores):
-    """Merge multiple data stores into one"""
-    merged_store = {}
+    """Merge multiple data stores into one, concatenating the columns without copying them"""
+    parts = {}
     for store in data_stores:
         for field_name, data in store.items():
-            if field_name not in merged_store:
-                merged_store[field_name] = []
-            if isinstance(data, list):
-                merged_store[field_name].extend(data)
-            else:
-                merged_store[field_name].append(data)
-    return merged_store
+            parts.setdefault(field_name, []).append(data)
+    return {field_name: concat_columns(data) for field_name, data in parts.items()}
 
 def get_next_available_filename(output_dir, base_name="output", ext=".xlsx"):
     """Find next available filename in sequence (output.xlsx, output1.xlsx, etc.)"""
@@ -635,55 +1358,310 @@ def get_next_available_filename(output_dir, base_name="output", ext=".xlsx"):
             return filepath
         i += 1
 
-def process_files(mapping_schema):
+def read_input_files(input_files, mapping_schema, workers=None, cache=None, reader=None):
+    """
+    Read and validate every input file, returning the data stores in input order.
+    With workers > 1 the files are read in a process pool of that size,
+    otherwise they are read one after another.
+    With a DataStoreCache, files whose content and mapping plan are unchanged
+    since they were last read are loaded from the cache instead.
+    Workbooks are read with the "reader" backend of their entry, else with
+    reader_backend(reader), and CSV files with the "encoding" of their entry.
+    """
+    input_paths = [input_file["path"] for input_file in input_files]
+    input_types = [input_file.get("type", "excel") for input_file in input_files]
+    readers = [input_file.get("reader") or reader_backend(reader) for input_file in input_files]
+    encodings = [input_file.get("encoding") for input_file in input_files]
+    if cache is None:
+        return read_data_stores(input_paths, mapping_schema, workers, input_types, readers, encodings)
+
+    plan_hash = get_mapping_plan(mapping_schema).schema_hash
+    data_stores = []
+    keys = []
+    with measure("cache", "lookup"):
+        for input_path, file_reader, encoding in zip(input_paths, readers, encodings):
+            key = cache.key(input_path, plan_hash, file_reader, encoding)
+            data_store = cache.get(key)
+            if data_store is not None:
+                print(f"Using cached data for {input_path}")
+            keys.append(key)
+            data_stores.append(data_store)
+
+    # Only the files that missed the cache are read
+    missing = [i for i, data_store in enumerate(data_stores) if data_store is None]
+    read_stores = read_data_stores(
+        [input_paths[i] for i in missing],
+        mapping_schema,
+        workers,
+        [input_types[i] for i in missing],
+        [readers[i] for i in missing],
+        [encodings[i] for i in missing],
+    )
+    with measure("cache", "store"):
+        for i, data_store in zip(missing, read_stores):
+            cache.put(keys[i], data_store)
+            data_stores[i] = data_store
+    return data_stores
+
+def collect_data_stores(reads):
+    """
+    Call every read (a function returning a data store) in order. The
+    ValidationErrors of all of them are raised as one once they have all run.
+    """
+    report = ValidationReport()
+    data_stores = []
+    for read in reads:
+        try:
+            data_stores.append(read())
+        except ValidationError as error:
+            report.extend(error.violations)
+    report.raise_errors()
+    return data_stores
+
+def read_data_stores(
+    input_paths, mapping_schema, workers=None, input_types=None, readers=None, encodings=None
+):
+    """
+    Read and validate input files, in a process pool of size workers if workers > 1.
+    input_types gives the type of every file (default: all "excel"), readers
+    the reader backend of every file (default: reader_backend()) and encodings
+    the text encoding of every CSV file (default: CSV_ENCODING).
+    The validation errors of all files are raised together.
+    """
+    if input_types is None:
+        input_types = ["excel"] * len(input_paths)
+    if readers is None:
+        readers = [reader_backend()] * len(input_paths)
+    if encodings is None:
+        encodings = [None] * len(input_paths)
+    file_args = list(zip(input_paths, input_types, readers, encodings))
+    if workers and workers > 1 and len(input_paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(input_paths))) as executor:
+            futures = [
+                executor.submit(
+                    read_and_validate_data, input_path, mapping_schema, STREAMING_READ, input_type, reader, encoding
+                )
+                for input_path, input_type, reader, encoding in file_args
+            ]
+            # Results in submission order, whatever order they finish in
+            return collect_data_stores(future.result for future in futures)
+
+    def read_file(input_path, input_type, reader, encoding):
+        with measure("file", input_path) as file_measurement:
+            data_store = read_and_validate_data(
+                input_path,
+                mapping_schema,
+                streaming=STREAMING_READ,
+                input_type=input_type,
+                reader=reader,
+                encoding=encoding,
+            )
+            if file_measurement is not None:
+                file_measurement.rows = max(map(count_rows, data_store.values()), default=0)
+        return data_store
+
+    return collect_data_stores(
+        partial(read_file, *args) for args in file_args
+    )
+
+def open_template(template):
+    """
+    A modifiable template workbook from a path, bytes or a binary file-like object.
+    Templates are cloned from the template cache. A missing path or None gives a new blank workbook.
+    """
+    from openpyxl import Workbook
+    from template_cache import load_template, load_template_content
+
+    if template is None:
+        return Workbook()
+    if isinstance(template, (str, os.PathLike)):
+        if os.path.exists(template):
+            return load_template(template)
+        return Workbook()
+    if isinstance(template, (bytes, bytearray)):
+        return load_template_content(bytes(template))
+    return load_template_content(template.read())
+
+def write_output(data_store, mapping_schema, template_path, output_file_path):
+    """
+    Write the output workbook from the template, streaming it if STREAMING_WRITE is set.
+    template_path may also be template bytes or a file-like object, and
+    output_file_path a writable binary stream.
+    """
+    if STREAMING_WRITE:
+        # Stream the template and data straight into the output file
+        stream_generate_output(data_store, mapping_schema, template_path, output_file_path)
+        return
+
+    # Start from a cached copy of the template or a new blank workbook
+    output_workbook = open_template(template_path)
+    write_mapped_data(output_workbook, get_mapping_plan(mapping_schema), data_store)
+    output_workbook.save(output_file_path)
+
+def read_mapping_schema(mapping):
+    """Mapping schema from a dict, a path, JSON bytes or a file-like object"""
+    if mapping is None:
+        return get_mapping_schema()
+    if isinstance(mapping, dict):
+        return mapping
+    if isinstance(mapping, (str, os.PathLike)):
+        with open(mapping, "r") as file:
+            return json.load(file)
+    if isinstance(mapping, (bytes, bytearray)):
+        return json.loads(mapping)
+    return json.load(mapping)
+
+def open_input(source):
+    """An input source the readers accept: a path or a binary file-like object"""
+    if isinstance(source, (bytes, bytearray)):
+        return BytesIO(source)
+    return source
+
+def convert_roster(
+    inputs, mapping=None, template=None, output=None, reader=None, input_types=None, encoding=None
+):
+    """
+    Convert input rosters to the output workbook without going through the disk.
+
+    Args:
+        inputs: Input files as paths, bytes or binary file-like objects. Paths and
+            named files ending in .csv or .parquet are read as CSV/Parquet,
+            everything else (including bytes) as Excel workbooks unless
+            input_types says otherwise
+        mapping: Mapping schema as a dict, path, JSON bytes or file-like object
+            (default: the schema from mapping_file_path)
+        template: Template workbook as a path, bytes or binary file-like object
+            (default: TEMPLATE_FILE)
+        output: Binary stream to write the output workbook to
+        reader: Reader backend for the input workbooks (default: reader_backend())
+        input_types: Type of every input ("excel", "csv" or "parquet"), or None
+            to infer each from its name. Needed for CSV/Parquet given as bytes
+        encoding: Text encoding of CSV inputs (default: tabular_sources.CSV_ENCODING)
+
+    Returns:
+        bytes: The output workbook, or None if it was written to output
+    """
+    schema = read_mapping_schema(mapping)
+    if template is None:
+        template = TEMPLATE_FILE.get("path")
+    reader = reader_backend(reader)
+
+    def read_input(idx, source):
+        if input_types is not None:
+            input_type = input_types[idx]
+        elif isinstance(source, (bytes, bytearray)):
+            input_type = "excel"
+        else:
+            input_type = input_type_from_path(getattr(source, "name", source))
+        with measure("file", getattr(source, "name", f"input{idx + 1}")):
+            return read_and_validate_data(
+                open_input(source),
+                schema,
+                streaming=STREAMING_READ,
+                input_type=input_type,
+                reader=reader,
+                encoding=encoding,
+            )
+
+    with measure("stage", "read"):
+        data_stores = collect_data_stores(
+            partial(read_input, idx, source) for idx, source in enumerate(inputs)
+        )
+    with measure("stage", "merge"):
+        merged_data_store = merge_data_stores(data_stores)
+    with measure("stage", "transform"):
+        transformed_data_store = apply_transformations_to_data_store(merged_data_store, schema)
+
+    stream = output if output is not None else BytesIO()
+    with measure("stage", "write"):
+        write_output(transformed_data_store, schema, template, stream)
+    if output is None:
+        return stream.getvalue()
+    return None
+
+def process_files(mapping_schema, reader=None, batch_rows=None, template_path=None, output_file_path=None):
+    """
+    Convert the configured INPUT_FILES. The template defaults to TEMPLATE_FILE
+    and the output to the next free output file in OUTPUT_PATH.
+    Returns the output file path.
+    """
     # Use configuration variables instead of reading from mapping_schema
     input_files = INPUT_FILES
-    template_path = TEMPLATE_FILE.get("path")
-    output_dir = OUTPUT_PATH
-
-    # Rest of the function remains the same
-    os.makedirs(output_dir, exist_ok=True)
-    output_file_path = get_next_available_filename(output_dir)
+    if template_path is None:
+        template_path = TEMPLATE_FILE.get("path")
+    if output_file_path is None:
+        os.makedirs(OUTPUT_PATH, exist_ok=True)
+        output_file_path = get_next_available_filename(OUTPUT_PATH)
+
+    if PROFILE_DIR is None:
+        run_job(input_files, mapping_schema, template_path, output_file_path, reader, batch_rows)
+        return output_file_path
+
+    # Name the report after the output file, e.g. output3.profile.json
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    job_name = Path(output_file_path).stem
+    report_path = os.path.join(PROFILE_DIR, f"{job_name}.profile.json")
+    with profile_job(
+        job_name,
+        report_path,
+        cprofile=PROFILE_CPROFILE,
+        trace_memory=PROFILE_TRACEMALLOC,
+    ):
+        run_job(input_files, mapping_schema, template_path, output_file_path, reader, batch_rows)
+    print(f"Profiling report written to {report_path}")
+    return output_file_path
+
+def run_job(input_files, mapping_schema, template_path, output_file_path, reader=None, batch_rows=None):
+    """
+    Read, merge and transform the input files and write the output file.
+    reader is the reader backend of the job (default: reader_backend()).
+    With batch_rows (default: BATCH_ROWS) the job runs through the batch pipeline.
+    """
+    batch_rows = batch_rows or BATCH_ROWS
+    cache = None
+    if DATA_STORE_CACHE_DIR is not None and not batch_rows:
+        cache = DataStoreCache(DATA_STORE_CACHE_DIR, DATA_STORE_CACHE_MAX_BYTES)
 
     try:
-        data_stores = []
-        for input_file in input_files:
-            input_file_path = input_file["path"]
-            workbook = load_workbook(input_file_path, data_only=True)
-            for sheet_name in workbook.sheetnames:
-                worksheet = workbook[sheet_name]
-                max_row = worksheet.max_row
-                # print(f"Max rows in {input_file_path} - {sheet_name}: {max_row}")
-            data_store = read_and_validate_data(input_file_path, mapping_schema)
-            data_stores.append(data_store)           
+        if batch_rows:
+            from batch_pipeline import run_batched_job
+
+            run_batched_job(
+                input_files, mapping_schema, template_path, output_file_path, batch_rows, reader
+            )
+            return
+
+        with measure("stage", "read"):
+            data_stores = read_input_files(
+                input_files,
+                mapping_schema,
+                workers=PARALLEL_WORKERS,
+                cache=cache,
+                reader=reader,
+            )
         # Merge all data stores
-        merged_data_store = merge_data_stores(data_stores)
+        with measure("stage", "merge"):
+            merged_data_store = merge_data_stores(data_stores)
 
         # Apply transformations to the merged data store
-        transformed_data_store = apply_transformations_to_data_store(
-            merged_data_store, mapping_schema
-        )
-
-        # Copy template file to output location or create a new blank workbook
-        if template_path and os.path.exists(template_path):
-            shutil.copy2(template_path, output_file_path)
-        else:
-            Workbook().save(output_file_path)
+        with measure("stage", "transform"):
+            transformed_data_store = apply_transformations_to_data_store(
+                merged_data_store, mapping_schema
+            )
 
         # Generate output with transformed data
-        use_mapping_generate_output(
-            transformed_data_store, mapping_schema, output_file_path
-        )
+        with measure("stage", "write"):
+            write_output(
+                transformed_data_store, mapping_schema, template_path, output_file_path
+            )
     except Exception as e:
         print(f"Error processing files: {e}")
         if os.path.exists(output_file_path):
             os.remove(output_file_path)
         raise
 
-
 if __name__ == "__main__":
-    # Load the mapping schema
-    with open(mapping_file_path, "r") as file:
-        mapping_schema = json.load(file)
     # Process all files
-    process_files(mapping_schema)
\ No newline at end of file
+    process_files(get_mapping_schema())
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Validation reports.
+
+Reading an input used to stop at the first empty required value, so a roster
+with many problems took one run per problem. Now every value is checked once,
+while it is resolved, and each violation is added to a ValidationReport with
+the cell it came from. The read raises one ValidationError listing all of
+them after the pass.
+
+Violations are grouped by (input, field, message, sheet, column) with their
+rows in an array of ints, so even a roster where every row fails costs a few
+bytes per violation, and consecutive rows are reported as one range.
+"""
+from array import array
+
+# Cell ranges listed per line of the report; the rest are only counted
+REPORT_RANGES_PER_LINE = 20
+
+
+def column_letter(col_idx):
+    """The letters of a column index (1 -> 'A', 28 -> 'AB')"""
+    letters = ""
+    while col_idx:
+        col_idx, remainder = divmod(col_idx - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def row_ranges(rows):
+    """Sorted rows as (first, last) runs of consecutive rows"""
+    runs = []
+    for row in sorted(set(rows)):
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return runs
+
+
+class ValidationError(ValueError):
+    """
+    Every violation found while reading, as one error whose message is the
+    full report. violations holds the groups of the ValidationReport.
+    """
+
+    def __init__(self, message, violations=()):
+        super().__init__(message)
+        self.violations = list(violations)
+
+    def __reduce__(self):
+        # Errors raised in worker processes are pickled back with their violations
+        return type(self), (str(self), self.violations)
+
+
+class ValidationReport:
+    """Violations collected during a read, raised together by raise_errors"""
+
+    def __init__(self, source=None):
+        # Default input of the violations added
+        self.source = source
+        # (source, field name, message, sheet, column) -> array of rows (0 when unknown)
+        self.groups = {}
+
+    def add(self, field_name, message, sheet=None, column=None, row=None, source=None):
+        key = (source if source is not None else self.source, field_name, message, sheet, column)
+        rows = self.groups.get(key)
+        if rows is None:
+            rows = self.groups[key] = array("q")
+        rows.append(row or 0)
+
+    @property
+    def violations(self):
+        """The groups as (source, field name, message, sheet, column, rows)"""
+        return [(*key, rows) for key, rows in self.groups.items()]
+
+    def extend(self, violations):
+        """Add the violations of another report or a ValidationError"""
+        for *key, rows in violations:
+            self.groups.setdefault(tuple(key), array("q")).extend(rows)
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.groups.values())
+
+    def location(self, sheet, column, rows):
+        """Where a group of violations is, e.g. "Roster!B7:B9, B12" """
+        if sheet is None:
+            return "default value"
+        if column is None:
+            return sheet
+        letter = column_letter(column)
+        cells = [
+            f"{letter}{first}" if first == last else f"{letter}{first}:{letter}{last}"
+            for first, last in row_ranges(row for row in rows if row)
+        ]
+        if len(cells) > REPORT_RANGES_PER_LINE:
+            cells[REPORT_RANGES_PER_LINE:] = [f"and {len(cells) - REPORT_RANGES_PER_LINE} more ranges"]
+        return f"{sheet}!{', '.join(cells)}" if cells else sheet
+
+    def format(self):
+        count = len(self)
+        lines = [f"{count} validation error{'s' if count != 1 else ''}:"]
+        for (source, field_name, message, sheet, column), rows in self.groups.items():
+            where = self.location(sheet, column, rows)
+            if source is not None:
+                where = f"{source} {where}"
+            times = f" ({len(rows)} values)" if len(rows) > 1 else ""
+            lines.append(f"  {field_name} at {where}: {message}{times}")
+        return "\n".join(lines)
+
+    def raise_errors(self):
+        """Raise a ValidationError with the report if any violation was added"""
+        if self.groups:
+            raise ValidationError(self.format(), self.violations)
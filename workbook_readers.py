@@ -0,0 +1,123 @@
+"""
+Reader backends for the cell values of input workbooks.
+
+    "openpyxl"           load_workbook: the whole workbook loaded as cells
+    "openpyxl-readonly"  load_workbook(read_only=True): rows are parsed from
+                         the sheet XML while they are iterated
+    "calamine"           python-calamine (optional): a compiled reader that
+                         extracts cell values only, several times faster
+
+open_values_workbook gives a workbook with sheetnames, active,
+workbook[sheet_name] and close(), whose sheets have iter_rows(...,
+values_only=True) and reset_dimensions(). That is all the code reading only
+values uses, so any backend works there. Formulas are read as their cached
+values. Code that needs styles or cell objects (merging workbooks) has to use
+one of the openpyxl backends.
+"""
+import datetime
+import os
+
+READER_BACKENDS = ("openpyxl", "openpyxl-readonly", "calamine")
+
+
+class ValuesSheet:
+    """A sheet that is only a sequence of rows of values, read from row 1 on every iteration"""
+
+    def __init__(self, title, read_rows):
+        self.title = title
+        self.read_rows = read_rows
+
+    def reset_dimensions(self):
+        pass
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=True):
+        if not values_only:
+            raise ValueError(f"Sheet {self.title} only provides cell values")
+        min_row = min_row or 1
+        start = (min_col or 1) - 1
+        for row_idx, row in enumerate(self.read_rows(), start=1):
+            if max_row is not None and row_idx > max_row:
+                break
+            if row_idx < min_row:
+                continue
+            if min_col is None and max_col is None:
+                yield row
+            else:
+                # Columns outside the row are empty cells, like openpyxl pads them
+                stop = len(row) if max_col is None else max_col
+                yield tuple(row[start:stop]) + (None,) * (stop - max(len(row), start))
+
+
+class ValuesWorkbook:
+    """Sheets of values by name. The first sheet is the active one."""
+
+    read_only = True
+
+    def __init__(self, sheets, close=None):
+        self.sheets = {sheet.title: sheet for sheet in sheets}
+        self.close_reader = close
+
+    @property
+    def sheetnames(self):
+        return list(self.sheets)
+
+    @property
+    def active(self):
+        return next(iter(self.sheets.values()))
+
+    def __getitem__(self, sheet_name):
+        try:
+            return self.sheets[sheet_name]
+        except KeyError:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.") from None
+
+    def close(self):
+        if self.close_reader is not None:
+            self.close_reader()
+
+
+def calamine_value(value):
+    """A python-calamine value as openpyxl reads it"""
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Whole numbers are stored without a decimal point, which openpyxl reads as int
+        return int(value)
+    if type(value) is datetime.date:
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+def open_calamine(source):
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError:
+        raise ImportError('The "calamine" reader backend requires python-calamine') from None
+
+    calamine_workbook = CalamineWorkbook.from_object(source)
+
+    def sheet_rows(sheet_name):
+        def read_rows():
+            rows = calamine_workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+            for row in rows:
+                yield tuple(map(calamine_value, row))
+
+        return read_rows
+
+    return ValuesWorkbook(
+        [ValuesSheet(name, sheet_rows(name)) for name in calamine_workbook.sheet_names],
+        close=getattr(calamine_workbook, "close", None),
+    )
+
+
+def open_values_workbook(source, backend="openpyxl-readonly"):
+    """An input workbook (path or binary file-like object) opened with a reader backend"""
+    if backend == "calamine":
+        if isinstance(source, (str, os.PathLike)):
+            source = os.fspath(source)
+        return open_calamine(source)
+    if backend in ("openpyxl", "openpyxl-readonly"):
+        from openpyxl import load_workbook
+
+        return load_workbook(source, read_only=backend == "openpyxl-readonly", data_only=True)
+    raise ValueError(f"Unknown reader backend: {backend} (expected one of {', '.join(READER_BACKENDS)})")
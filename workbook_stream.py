@@ -0,0 +1,194 @@
+"""
+Helpers for writing a workbook row by row in write-only mode on top of a
+template workbook held in memory.
+
+The streamed workbook takes over the template's workbook parts, including
+its style tables, so template cells keep their style ids. Every template
+sheet is recreated with its layout parts (dimensions, merges, validations,
+conditional formats, print settings, ...) and its cells are cloned as the
+rows are appended.
+"""
+from copy import copy
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.read_only import ReadOnlyCell
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import (
+    BUILTIN_FORMATS,
+    BUILTIN_FORMATS_MAX_SIZE,
+    BUILTIN_FORMATS_REVERSE,
+)
+
+# Worksheet parts copied from the template to the streamed output sheet
+TEMPLATE_SHEET_PARTS = (
+    "column_dimensions",
+    "row_dimensions",
+    "merged_cells",
+    "data_validations",
+    "conditional_formatting",
+    "_tables",
+    "_images",
+    "_charts",
+    "print_options",
+    "page_margins",
+    "page_setup",
+    "HeaderFooter",
+    "auto_filter",
+    "sheet_properties",
+    "views",
+    "sheet_format",
+    "row_breaks",
+    "col_breaks",
+    "scenarios",
+    "protection",
+    "_print_rows",
+    "_print_cols",
+    "_print_area",
+    "sheet_state",
+    "defined_names",
+)
+
+# Workbook parts taken over from the template. The style tables are shared
+# (not copied) so the style ids of copied template cells stay valid.
+TEMPLATE_WORKBOOK_PARTS = (
+    "properties",
+    "custom_doc_props",
+    "loaded_theme",
+    "defined_names",
+    "calculation",
+    "views",
+    "security",
+    "code_name",
+    "_external_links",
+    "_active_sheet_index",
+    "_fonts",
+    "_fills",
+    "_borders",
+    "_alignments",
+    "_protections",
+    "_number_formats",
+    "_cell_styles",
+    "_named_styles",
+    "_differential_styles",
+    "_table_styles",
+    "_colors",
+)
+
+
+def stream_workbook(template):
+    """A write-only workbook that takes over the template's workbook parts"""
+    output_workbook = Workbook(write_only=True)
+    for part in TEMPLATE_WORKBOOK_PARTS:
+        setattr(output_workbook, part, getattr(template, part))
+    return output_workbook
+
+
+def stream_template_sheet(output_workbook, template_sheet):
+    """Create the streamed copy of a template sheet, without its cells"""
+    sheet = output_workbook.create_sheet(template_sheet.title)
+    for part in TEMPLATE_SHEET_PARTS:
+        setattr(sheet, part, getattr(template_sheet, part))
+    return sheet
+
+
+def close_streamed_sheets(output_workbook):
+    """
+    Finish the temporary files of a write-only workbook that won't be saved.
+    An abandoned sheet fails to write its closing tags when it is garbage collected.
+    """
+    for sheet in output_workbook.worksheets:
+        if not sheet.closed:
+            sheet.close()
+
+
+def template_rows(template_sheet):
+    """Template cells grouped by row: {row: {column: cell}}"""
+    rows = {}
+    for (row_idx, col_idx), template_cell in template_sheet._cells.items():
+        rows.setdefault(row_idx, {})[col_idx] = template_cell
+    return rows
+
+
+def last_dimension_row(sheet):
+    """Last row with dimensions (e.g. a height). Those rows are written even without cells."""
+    return max(sheet.row_dimensions, default=0)
+
+
+def clone_template_cell(sheet, template_cell):
+    """Copy a template cell (value, type, style, link, comment) onto the streamed sheet"""
+    cell = WriteOnlyCell(sheet)
+    cell._value = template_cell._value
+    cell.data_type = template_cell.data_type
+    cell._style = copy(template_cell._style)
+    if template_cell.hyperlink is not None:
+        cell.hyperlink = copy(template_cell.hyperlink)
+    if template_cell.comment is not None:
+        cell.comment = copy(template_cell.comment)
+    return cell
+
+
+def row_values(row_cells):
+    """Row cells by column as a list for append. Cells are placed by position, so gaps are None."""
+    return [row_cells.get(col_idx) for col_idx in range(1, max(row_cells, default=0) + 1)]
+
+
+class StyleMapper:
+    """
+    Maps the cell styles of a source workbook to styles of the target workbook.
+    Each distinct source style is resolved once; every cell with that style then
+    shares the resulting StyleArray. Read-only cells are looked up by their
+    style id, so their styles are never materialized per cell.
+    Font, border, fill, number format, protection and alignment are carried over,
+    the same parts that copying the cell style attributes one by one would copy.
+    """
+
+    def __init__(self, source_workbook, target_workbook):
+        self.source = source_workbook
+        self.target = target_workbook
+        self.styles = {}
+
+    def __call__(self, cell):
+        """Target StyleArray for a source cell's style, or None for the default style"""
+        if isinstance(cell, ReadOnlyCell):
+            key = cell._style_id
+        elif getattr(cell, "_style", None) is not None:
+            key = tuple(cell._style)
+        else:
+            # Unstyled or missing (EmptyCell) cells
+            return None
+        try:
+            return self.styles[key]
+        except KeyError:
+            source_style = cell.style_array if isinstance(cell, ReadOnlyCell) else cell._style
+            style = self.styles[key] = self.map_style(source_style)
+            return style
+
+    def map_style(self, source_style):
+        if not any(source_style):
+            return None
+        source = self.source
+        target = self.target
+        style = StyleArray()
+        style.fontId = target._fonts.add(copy(source._fonts[source_style.fontId]))
+        style.borderId = target._borders.add(copy(source._borders[source_style.borderId]))
+        style.fillId = target._fills.add(copy(source._fills[source_style.fillId]))
+        style.numFmtId = self.map_number_format(source_style.numFmtId)
+        style.protectionId = target._protections.add(
+            copy(source._protections[source_style.protectionId])
+        )
+        style.alignmentId = target._alignments.add(
+            copy(source._alignments[source_style.alignmentId])
+        )
+        return style
+
+    def map_number_format(self, number_format_id):
+        if number_format_id < BUILTIN_FORMATS_MAX_SIZE:
+            number_format = BUILTIN_FORMATS.get(number_format_id, "General")
+        else:
+            number_format = self.source._number_formats[
+                number_format_id - BUILTIN_FORMATS_MAX_SIZE
+            ]
+        if number_format in BUILTIN_FORMATS_REVERSE:
+            return BUILTIN_FORMATS_REVERSE[number_format]
+        return self.target._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE